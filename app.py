@@ -1,30 +1,83 @@
 import os
 from os.path import join, dirname
 from dotenv import load_dotenv
-from flask import Flask, render_template, request, redirect, url_for, flash, session,jsonify
-from pymongo import MongoClient
+from flask import Flask, render_template, request, redirect, url_for, flash, session,jsonify, Response, stream_with_context
+from pymongo.errors import DuplicateKeyError
 from werkzeug.security import generate_password_hash, check_password_hash
 from bson import ObjectId
 from werkzeug.utils import secure_filename
+from werkzeug.local import LocalProxy
 from functools import wraps
-from datetime import datetime
+from datetime import datetime, timedelta
+from indexes import ensure_indexes
+from pagination import paginate, get_per_page
+from orders import (ORDER_STATUSES, OrderFilterError, attach_users, design_files, get_order_detail, order_history,
+                    order_query)
+from counters import count_user, count_product, count_order, read_totals
+from export import FORMATS, ExportError, export_orders, export_customers
+from bulk_orders import BulkError, bulk_update_status, bulk_delete
+from rollups import ORDER_FIELDS, PERIODS, DIMENSIONS, record_order, report
+from status_events import record_created, change_status, order_timeline, time_in_status, stuck_orders
+from users import current_user, invalidate_user
+from catalog import all_products, latest_products, invalidate_catalog, catalog_version, price_maps
+from pricing import PricingError, from_form as pricing_from_form, unit_price, quote
+from search import search_index
+from page_cache import cached_page, inject_cache_flag
+from uploads import UploadRequest, UploadError, apply_upload_limit, cleanup_upload_temp, MB
+from storage import store_upload, release, release_many
+from images import responsive_img
+from static_assets import load_manifest, hashed_static_url, serve_static
+from database import db, reporting, pool_stats
+from secret_key import load_secret_key
+from jobs import start_workers, stats as job_stats
+from carts import (CartError, get_items as get_cart_items, add_item as add_cart_item,
+                   update_quantity as update_cart_quantity, remove_item as remove_cart_item, price_items,
+                   checkout as cart_checkout)
+from idempotency import FIELD as IDEMPOTENCY_FIELD, IdempotencyError, new_token, read_token, find_order
+from chunked_upload import (ChunkedUploadError, CHUNKED_THRESHOLD, CHUNK_SIZE, init_upload, get_upload,
+                            write_chunk, finalize_upload, attach_upload)
 
 dotenv_path = join(dirname(__file__), '.env')
 load_dotenv(dotenv_path)
 
-MONGODB_URI = os.environ.get("MONGODB_URI")
-DB_NAME =  os.environ.get("DB_NAME")
+# Inisialisasi aplikasi Flask. Semua konfigurasi dilakukan saat import supaya `app:app`
+# (gunicorn, `flask run`, App Service) dan `wsgi:app` mendapat aplikasi yang sama.
+app = Flask(__name__)
+# Secret key yang sama untuk semua worker (lihat secret_key.py)
+app.secret_key = load_secret_key()
+app.config['PER_PAGE'] = int(os.environ.get('PER_PAGE', 5))  # Jumlah baris per halaman admin
 
-client = MongoClient(MONGODB_URI)
-db = client[DB_NAME]
+# Upload file ditulis streaming ke disk; batas ukuran per endpoint ada di uploads.UPLOAD_LIMITS
+app.request_class = UploadRequest
+app.config['MAX_CONTENT_LENGTH'] = 2 * MB  # Batas untuk request tanpa file
+app.before_request(apply_upload_limit)
+app.teardown_request(cleanup_upload_temp)
 
-# Inisialisasi aplikasi Flask
-app = Flask(__name__)
-app.secret_key = os.urandom(24)
-users_collection = db['users']
-admins_collection = db['admins']
+# Aset statis ber-hash (cache panjang) dan versi .br/.gz; lihat static_assets.py
+load_manifest()
+app.url_defaults(hashed_static_url)
+app.view_functions['static'] = serve_static
+# Koneksi Mongo dibuat saat pertama dipakai (setelah fork); lihat database.py
+users_collection = LocalProxy(lambda: db['users'])
+admins_collection = LocalProxy(lambda: db['admins'])
+
+
+@app.before_request
+def start_job_workers():
+    """Thread worker antrean job (JOBS_THREADS; 0 jika memakai worker.py terpisah).
+
+    Dimulai pada request pertama di setiap proses (setelah fork), bukan saat import.
+    """
+    start_workers(db)
 
 
+@app.errorhandler(413)
+def file_terlalu_besar(e):
+    if request.endpoint == 'upload_chunk':
+        return jsonify({'error': 'Potongan file terlalu besar.'}), 413
+    flash('Ukuran file terlalu besar.', 'danger')
+    return redirect(request.referrer or url_for('home'))
+
 #FUNGSI VALIDASI LOGIN
 def login_required(role=None):
     def wrapper(func):
@@ -52,15 +105,18 @@ def inject_user_info():
         'user_photo': 'profil_user/default.png'  # Foto default
     }
     
-    # Jika pengguna sudah login, ambil informasi dari database
+    # Jika pengguna sudah login, ambil informasi (sekali per request, lewat cache)
     if 'user' in session:
-        user = db.users.find_one({'_id': ObjectId(session['user'])})
+        user = current_user(db)
         if user:
             user_info['user_name'] = user.get('name', '')
             user_info['user_photo'] = user.get('photo', 'profil_user/default.png')
     
     return user_info
 
+app.context_processor(inject_cache_flag)
+app.jinja_env.globals['responsive_img'] = responsive_img
+
 # Fungsi untuk validasi file
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf', 'zip', 'rar'}
 def allowed_file(filename):
@@ -72,12 +128,14 @@ def allowed_file_admin(filename):
 
 #BAGIAN USER
 @app.route('/')
+@cached_page(lambda: catalog_version(db))
 def home():
     """Halaman utama."""
-    produk_terbaru = list(db.products.find().sort('_id', -1).limit(4))
+    produk_terbaru = latest_products(db, 4)
     return render_template('home.html', active_page='home', produk_terbaru=produk_terbaru)
 
 @app.route('/about')
+@cached_page()
 def about():
     return render_template('about.html')
 
@@ -125,12 +183,18 @@ def register():
 
         # Hashing kata sandi dan menyimpan pengguna ke database
         hashed_password = generate_password_hash(password)
-        users_collection.insert_one({
-            'name': name,
-            'phone': phone,
-            'email': email,
-            'password': hashed_password
-        })
+        try:
+            users_collection.insert_one({
+                'name': name,
+                'phone': phone,
+                'email': email,
+                'password': hashed_password
+            })
+        except DuplicateKeyError:
+            # Pendaftaran ganda dengan email yang sama (dijaga unique index)
+            flash('Email sudah terdaftar!', 'danger')
+            return redirect(url_for('register'))
+        count_user(db)
 
         flash('Registrasi berhasil! Silakan login.', 'success')
         return redirect(url_for('login'))
@@ -138,9 +202,36 @@ def register():
     return render_template('register.html')
 
 @app.route('/produk', methods=['GET'])
+@cached_page(lambda: catalog_version(db))
 def produk():
-    products = db.products.find()
-    return render_template('produk.html', products=products)
+    products = all_products(db)
+    return render_template('produk.html', products=products, categories=search_index(db).categories)
+
+@app.route('/api/produk/search', methods=['GET'])
+def cari_produk():
+    """Cari produk. Query: q, kategori, limit. Hasil: produk (JSON ringkas) dan facet kategori."""
+    result = search_index(db).search(request.args.get('q', ''), request.args.get('kategori') or None,
+                                     request.args.get('limit', type=int))
+    return jsonify(result)
+
+@app.route('/api/quote', methods=['POST'])
+def hitung_harga():
+    """Hitung harga beberapa baris sekaligus untuk total di form pemesanan.
+
+    Body JSON: {"lines": [{"produk_id", "ukuran", "jumlah"}, ...]}. Harga dari snapshot katalog;
+    harga final tetap dihitung ulang dari database saat pesanan dibuat.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        return jsonify(quote(price_maps(db), data.get('lines')))
+    except PricingError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/produk/suggest', methods=['GET'])
+def saran_produk():
+    """Saran typeahead dari awalan kata di `q`."""
+    limit = max(1, min(request.args.get('limit', 8, type=int), 20))
+    return jsonify(search_index(db).suggest(request.args.get('q', ''), limit))
 
 @app.route('/pemesanan/<string:produk_id>', methods=['GET', 'POST'])
 @login_required(role='user')
@@ -151,20 +242,32 @@ def pemesanan(produk_id):
         return redirect(url_for('produk'))
 
     if request.method == 'POST':
+        user_id = ObjectId(session['user'])
+        try:
+            idempotency_key = read_token(request.form.get('idempotency_key'))
+        except IdempotencyError as e:
+            flash(str(e), 'warning')
+            return redirect(url_for('pemesanan', produk_id=produk_id))
+
+        # Formulir yang sama dikirim ulang: tampilkan pesanan pertama, file desain tidak disimpan lagi
+        existing = find_order(db, user_id, idempotency_key)
+        if existing:
+            flash('Pesanan ini sudah kami terima. Mohon unggah bukti pembayaran!', 'success')
+            return redirect(url_for('detail_pesanan', order_id=str(existing['_id'])))
+
         jumlah = int(request.form['jumlah'])
         ukuran = request.form['ukuran']
-        desain = request.files['desain']
         keterangan=request.form['keterangan']
         opsi_pengiriman = request.form['opsi_pengiriman']
         alamat = request.form.get("alamat")  # Ambil alamat pengiriman
         metode_pembayaran = request.form['metode_pembayaran']
 
-        # Cari harga berdasarkan ukuran
-        harga_per_satuan = None
-        for item in produk.get('dus_harga', []):
-            if item['ukuran'] == ukuran:
-                harga_per_satuan = int(item['hargaPcs'])
-                break
+        if jumlah < 1:
+            flash('Jumlah minimal 1.', 'danger')
+            return redirect(url_for('pemesanan', produk_id=produk_id))
+
+        # Harga per satuan sesuai ukuran dan harga grosir (pricing.py, tabel harga dari snapshot katalog)
+        harga_per_satuan = unit_price(price_maps(db).get(str(produk['_id']), {}), ukuran, jumlah)
 
         if harga_per_satuan is None:
             flash('Ukuran tidak valid.', 'danger')
@@ -172,69 +275,232 @@ def pemesanan(produk_id):
 
         # Hitung total biaya
         total_biaya = jumlah * harga_per_satuan
-        # Validasi file desain
-        if desain:
-            # Periksa apakah file memiliki nama
-            if desain.filename == '':
-                flash('Tidak ada file yang dipilih.', 'danger')
-                return redirect(url_for('pemesanan', produk_id=produk_id))
-            
-            # Validasi ekstensi file
-            if not allowed_file(desain.filename):
-                flash('File desain tidak valid. Gunakan file dengan ekstensi: png, jpg, jpeg, pdf, zip, rar', 'danger')
-                return redirect(url_for('pemesanan', produk_id=produk_id))
-        # Simpan file desain
-        if desain:
-            # Generate nama file dengan timestamp untuk menghindari duplikasi nama file
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')  # Format: YYYYMMDDHHMMSS
-            nama_file_desain = f"{timestamp}_{secure_filename(desain.filename)}"
-            desain_path = os.path.join('./static/uploads/', nama_file_desain)
-            desain.save(desain_path)
-
+        try:
+            nama_file_desain, nama_asli_desain = _store_design()
+        except UploadError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('pemesanan', produk_id=produk_id))
 
         # Simpan ke database pemesanan
+        now = datetime.now()
         order_data = {
-            'user_id': ObjectId(session['user']),
+            'user_id': user_id,
             'produk_id': ObjectId(produk_id),
             'nama_produk': produk['nama_produk'], 
             'ukuran': ukuran,
             'harga_per_satuan': harga_per_satuan,
             'jumlah': jumlah,
             'total_biaya': total_biaya,
-            'desain': nama_file_desain if desain else None,
+            'desain': nama_file_desain,
+            'desain_nama': secure_filename(nama_asli_desain) if nama_asli_desain else None,
             'keterangan':keterangan,
             'opsi_pengiriman': opsi_pengiriman,
             "alamat": alamat if opsi_pengiriman == "Antar ke lokasi" else None,
             'metode_pembayaran': metode_pembayaran,
             'status': 'Konfirmasi',
-            "tanggal_pemesanan": datetime.now()  # Menambahkan waktu saat ini
+            "tanggal_pemesanan": now,  # Menambahkan waktu saat ini
+            'status_since': now,
+            IDEMPOTENCY_FIELD: idempotency_key
         }
 
-        order = db.orders.insert_one(order_data)
+        try:
+            order = db.orders.insert_one(order_data)
+        except DuplicateKeyError:
+            # Kiriman ganda yang diproses bersamaan: pesanan pertama yang dipakai
+            release(db, 'desain', nama_file_desain)
+            existing = find_order(db, user_id, idempotency_key)
+            flash('Pesanan ini sudah kami terima. Mohon unggah bukti pembayaran!', 'success')
+            return redirect(url_for('detail_pesanan', order_id=str(existing['_id'])))
         order_id = str(order.inserted_id) 
+        record_created(db, order_data, actor=f"user:{session['user']}")
 
         flash(f'Pemesanan berhasil dilakukan, Total biaya: Rp {total_biaya:,}. Mohon unggah bukti pembayaran!', 'success')
         return redirect(url_for('detail_pesanan', order_id=order_id))
 
     metode_pembayaran = list(db.pembayaran.find())
-    return render_template('pemesanan.html', produk=produk, metode_pembayaran=metode_pembayaran)
+    return render_template('pemesanan.html', produk=produk, metode_pembayaran=metode_pembayaran,
+                           chunked_threshold=CHUNKED_THRESHOLD, chunk_size=CHUNK_SIZE,
+                           idempotency_token=new_token())
+
+def _store_design():
+    """Simpan file desain dari form pemesanan (langsung atau lewat upload bertahap).
+
+    Kembalikan (key storage, nama file asli), atau (None, None) jika tidak ada file.
+    UploadError berisi pesan untuk pengguna.
+    """
+    desain = request.files.get('desain')
+    desain_upload_id = request.form.get('desain_upload_id')  # file besar lewat upload bertahap
+    if desain:
+        # Periksa apakah file memiliki nama
+        if desain.filename == '':
+            raise UploadError('Tidak ada file yang dipilih.')
+        # Validasi ekstensi file
+        if not allowed_file(desain.filename):
+            raise UploadError('File desain tidak valid. Gunakan file dengan ekstensi: png, jpg, jpeg, pdf, zip, rar')
+        # Simpan file desain (disimpan sekali per isi file, lihat storage.py)
+        try:
+            return store_upload(db, desain, 'desain'), desain.filename
+        except UploadError as e:
+            raise UploadError(f'File desain tidak valid. {e}')
+    if desain_upload_id:
+        try:
+            return attach_upload(db, desain_upload_id, session['user'])
+        except ChunkedUploadError as e:
+            raise UploadError(f'File desain tidak valid. {e}')
+    return None, None
+
+#KERANJANG
+@app.route('/keranjang', methods=['GET'])
+@login_required(role='user')
+def keranjang():
+    """Isi keranjang dengan harga terkini dan form checkout."""
+    items = get_cart_items(db, ObjectId(session['user']))
+    harga = price_items(db, items)
+    metode_pembayaran = list(db.pembayaran.find())
+    return render_template('keranjang.html', items=list(zip(items, harga['lines'])), total=harga['total'],
+                           metode_pembayaran=metode_pembayaran, idempotency_token=new_token())
+
+@app.route('/keranjang/tambah/<string:produk_id>', methods=['POST'])
+@login_required(role='user')
+def tambah_keranjang(produk_id):
+    """Masukkan produk dari form pemesanan ke keranjang (desain ikut diunggah sekarang)."""
+    produk = db.products.find_one({'_id': ObjectId(produk_id)}, {'nama_produk': 1})
+    if not produk:
+        flash('Produk tidak ditemukan.', 'danger')
+        return redirect(url_for('produk'))
+
+    try:
+        form_key = read_token(request.form.get('idempotency_key'))
+    except IdempotencyError as e:
+        flash(str(e), 'warning')
+        return redirect(url_for('pemesanan', produk_id=produk_id))
+
+    jumlah = request.form.get('jumlah', type=int)
+    ukuran = request.form.get('ukuran')
+    if not jumlah or jumlah < 1:
+        flash('Jumlah minimal 1.', 'danger')
+        return redirect(url_for('pemesanan', produk_id=produk_id))
+    if unit_price(price_maps(db).get(str(produk['_id']), {}), ukuran, jumlah) is None:
+        flash('Ukuran tidak valid.', 'danger')
+        return redirect(url_for('pemesanan', produk_id=produk_id))
+
+    try:
+        nama_file_desain, nama_asli_desain = _store_design()
+    except UploadError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('pemesanan', produk_id=produk_id))
+
+    try:
+        _, baru = add_cart_item(db, ObjectId(session['user']), produk, ukuran, jumlah,
+                                desain=nama_file_desain,
+                                desain_nama=secure_filename(nama_asli_desain) if nama_asli_desain else None,
+                                keterangan=request.form.get('keterangan', ''), form_key=form_key)
+    except CartError as e:
+        release(db, 'desain', nama_file_desain)
+        flash(str(e), 'danger')
+        return redirect(url_for('keranjang'))
+    if not baru:
+        # Formulir yang sama dikirim ulang: barang sudah ada di keranjang
+        release(db, 'desain', nama_file_desain)
+    flash(f"{produk['nama_produk']} ditambahkan ke keranjang.", 'success')
+    return redirect(url_for('keranjang'))
+
+@app.route('/keranjang/<string:item_id>/jumlah', methods=['POST'])
+@login_required(role='user')
+def ubah_jumlah_keranjang(item_id):
+    try:
+        if not update_cart_quantity(db, ObjectId(session['user']), item_id, request.form.get('jumlah', 0, type=int)):
+            flash('Barang tidak ada di keranjang.', 'warning')
+    except CartError as e:
+        flash(str(e), 'danger')
+    return redirect(url_for('keranjang'))
+
+@app.route('/keranjang/<string:item_id>/hapus', methods=['POST'])
+@login_required(role='user')
+def hapus_keranjang(item_id):
+    item = remove_cart_item(db, ObjectId(session['user']), item_id)
+    if item:
+        release(db, 'desain', item.get('desain'))
+        flash(f"{item['nama_produk']} dihapus dari keranjang.", 'success')
+    return redirect(url_for('keranjang'))
+
+@app.route('/keranjang/checkout', methods=['POST'])
+@login_required(role='user')
+def checkout_keranjang():
+    """Pesan seluruh isi keranjang sebagai satu pesanan dengan satu bukti pembayaran."""
+    user_id = ObjectId(session['user'])
+    try:
+        idempotency_key = read_token(request.form.get('idempotency_key'))
+    except IdempotencyError as e:
+        flash(str(e), 'warning')
+        return redirect(url_for('keranjang'))
+
+    existing = find_order(db, user_id, idempotency_key)
+    if existing:
+        flash('Pesanan ini sudah kami terima. Mohon unggah bukti pembayaran!', 'success')
+        return redirect(url_for('detail_pesanan', order_id=str(existing['_id'])))
+
+    try:
+        order = cart_checkout(db, user_id, request.form['opsi_pengiriman'], request.form.get('alamat'),
+                              request.form['metode_pembayaran'], idempotency_key)
+    except CartError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('keranjang'))
+    except DuplicateKeyError:
+        # Checkout ganda yang diproses bersamaan: pesanan pertama yang dipakai
+        existing = find_order(db, user_id, idempotency_key)
+        flash('Pesanan ini sudah kami terima. Mohon unggah bukti pembayaran!', 'success')
+        return redirect(url_for('detail_pesanan', order_id=str(existing['_id'])))
+    record_created(db, order, actor=f"user:{session['user']}")
+
+    flash(f"Pemesanan berhasil dilakukan, Total biaya: Rp {order['total_biaya']:,}. Mohon unggah bukti pembayaran!",
+          'success')
+    return redirect(url_for('detail_pesanan', order_id=str(order['_id'])))
+#AKHIR KERANJANG
+
+#UPLOAD BERTAHAP (file desain besar)
+@app.errorhandler(ChunkedUploadError)
+def chunked_upload_error(e):
+    return jsonify({'error': str(e), **e.extra}), e.status
+
+@app.route('/upload/init', methods=['POST'])
+@login_required(role='user')
+def upload_init():
+    data = request.get_json(silent=True) or {}
+    return jsonify(init_upload(session['user'], data.get('filename', ''), data.get('size'))), 201
+
+@app.route('/upload/<string:upload_id>', methods=['GET'])
+@login_required(role='user')
+def upload_status(upload_id):
+    return jsonify(get_upload(upload_id, session['user']))
+
+@app.route('/upload/<string:upload_id>', methods=['PUT'])
+@login_required(role='user')
+def upload_chunk(upload_id):
+    offset = request.args.get('offset', type=int)
+    if offset is None:
+        raise ChunkedUploadError('Parameter offset wajib diisi.')
+    return jsonify(write_chunk(upload_id, session['user'], offset, request.stream,
+                               request.headers.get('X-Chunk-SHA256')))
+
+@app.route('/upload/<string:upload_id>/finalize', methods=['POST'])
+@login_required(role='user')
+def upload_finalize(upload_id):
+    data = request.get_json(silent=True) or {}
+    return jsonify(finalize_upload(upload_id, session['user'], data.get('sha256')))
+#AKHIR UPLOAD BERTAHAP
 
 @app.route('/detail_pesanan/<string:order_id>', methods=['GET'])
 @login_required(role='user')
 def detail_pesanan(order_id):
-    # Ambil data pesanan berdasarkan order_id
-    order = db.orders.find_one({'_id': ObjectId(order_id)})
+    # Ambil pesanan beserta pengguna dan produknya dalam satu query
+    order, user = get_order_detail(db, order_id)
 
     if not order:
         flash('Pesanan tidak ditemukan.', 'danger')
         return redirect(url_for('home'))
 
-    user = db.users.find_one({'_id': order['user_id']})
-
-    # Ambil informasi produk berdasarkan produk_id yang ada di pesanan
-    produk = db.products.find_one({'_id': ObjectId(order['produk_id'])})
-
-    return render_template('detail_pesanan.html', order=order, produk=produk, user=user)
+    return render_template('detail_pesanan.html', order=order, user=user)
 
 @app.route('/upload_bukti/<string:order_id>', methods=['POST'])
 @login_required(role='user')
@@ -256,16 +522,17 @@ def upload_bukti(order_id):
     # Validasi file
     if bukti_pembayaran and allowed_file(bukti_pembayaran.filename):
         # Simpan file bukti pembayaran
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')  # Format: YYYYMMDDHHMMSS
-        filename = f"{timestamp}_{secure_filename(bukti_pembayaran.filename)}"
-        bukti_path = os.path.join('./static/bukti_pembayaran', filename)
-        bukti_pembayaran.save(bukti_path)
-
-        # Perbarui pesanan dengan path bukti pembayaran
-        db.orders.update_one(
-            {'_id': ObjectId(order_id)},
-            {'$set': {'bukti_pembayaran': filename, 'status': 'Konfirmasi'}}
-        )
+        try:
+            filename = store_upload(db, bukti_pembayaran, 'bukti')
+        except UploadError as e:
+            flash(f'File bukti pembayaran tidak valid. {e}', 'danger')
+            return redirect(url_for('detail_pesanan', order_id=order_id))
+
+        # Perbarui pesanan dengan path bukti pembayaran; status kembali ke Konfirmasi (tercatat di riwayat)
+        db.orders.update_one({'_id': ObjectId(order_id)}, {'$set': {'bukti_pembayaran': filename}})
+        change_status(db, order_id, 'Konfirmasi', actor=f"user:{session['user']}", source='bukti')
+        # Bukti lama (jika diunggah ulang) tidak dipakai lagi
+        release(db, 'bukti', order.get('bukti_pembayaran'))
 
         flash('Bukti pembayaran berhasil diunggah.', 'success')
         return redirect(url_for('riwayat_pemesanan', order_id=order_id))
@@ -279,20 +546,48 @@ def upload_bukti(order_id):
 @app.route('/riwayat_pemesanan', methods=['GET'])
 @login_required(role='user')
 def riwayat_pemesanan():
-    # Ambil ID pengguna dari sesi
-    user_id = ObjectId(session['user'])
+    status = request.args.get('status')
+    pagination = _riwayat_page(status)
+    return render_template('riwayat_pemesanan.html', orders=pagination.items, pagination=pagination,
+                           current_status=status if status in ORDER_STATUSES else None)
+
+
+def _riwayat_page(status):
+    """Satu halaman pesanan milik pengguna yang login, difilter status di query."""
+    return order_history(
+        db,
+        ObjectId(session['user']),
+        status=status if status in ORDER_STATUSES else None,
+        cursor=request.args.get('cursor'),
+        per_page=get_per_page(10)
+    )
 
-    # Ambil semua data pesanan milik pengguna
-    orders = list(db.orders.find({'user_id': user_id}).sort('_id', -1))
 
-    return render_template('riwayat_pemesanan.html', orders=orders)
+@app.route('/riwayat_pemesanan/data', methods=['GET'])
+@login_required(role='user')
+def riwayat_pemesanan_data():
+    """Versi JSON untuk filter/pagination tanpa reload (dipakai JS di riwayat_pemesanan.html)."""
+    status = request.args.get('status')
+    current_status = status if status in ORDER_STATUSES else None
+    pagination = _riwayat_page(status)
+    # Link halaman di fragmen mengarah ke halaman HTML biasa
+    pagination.endpoint = 'riwayat_pemesanan'
+    html = render_template('riwayat_orders.html', orders=pagination.items, pagination=pagination,
+                           current_status=current_status)
+    return jsonify({
+        'status': current_status,
+        'html': html,
+        'page': pagination.page,
+        'has_prev': pagination.has_prev,
+        'has_next': pagination.has_next,
+        'prev_cursor': pagination.prev_cursor,
+        'next_cursor': pagination.next_cursor,
+    })
 
-app.config['UPLOAD_FOLDER'] = './static/profil_user/'  # Folder baru untuk menyimpan foto
 @app.route('/profil', methods=['GET'])
 @login_required(role='user')
 def profil():
-    user_id = session.get('user')
-    user = db.users.find_one({'_id': ObjectId(user_id)})
+    user = current_user(db)
     if not user:
         flash('Pengguna tidak ditemukan.', 'danger')
         return redirect(url_for('home'))
@@ -306,7 +601,7 @@ def profil():
 @login_required(role='user')
 def update_profile():
     user_id = session.get('user')
-    user = db.users.find_one({'_id': ObjectId(user_id)})
+    user = current_user(db)
     if not user:
         flash('Pengguna tidak ditemukan.', 'danger')
         return redirect(url_for('home'))
@@ -319,8 +614,8 @@ def update_profile():
         tanggal_lahir = request.form['tanggal_lahir']
         photo = request.files.get('photo')
         
-        # Gunakan foto lama atau foto default
-        photo_filename = user.get('photo', 'profil_user/default.png')
+        # Foto hanya diganti jika ada file baru
+        photo_filename = None
 
         # Cek apakah file foto diunggah
         if photo and photo.filename != '':
@@ -329,33 +624,36 @@ def update_profile():
                 flash('Format file tidak valid. Gunakan file jpg, jpeg, atau png.', 'danger')
                 return redirect(url_for('profil'))
 
-            # Buat folder profil_user jika belum ada
-            user_folder = os.path.join(app.config['UPLOAD_FOLDER'], str(user_id))
-            if not os.path.exists(user_folder):
-                os.makedirs(user_folder)
-
-            # Generate nama file dengan datetime untuk menghindari duplikasi nama file
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-            file_extension = os.path.splitext(photo.filename)[1]
-            filename = f'{timestamp}{file_extension}'
-            photo_path = os.path.join(user_folder, filename)
-            photo.save(photo_path)
-            photo_filename = f'profil_user/{user_id}/{filename}'
-
-        # Update data pengguna di database
-        db.users.update_one(
-            {'_id': ObjectId(user_id)},
-            {
-                '$set': {
-                    'name': name,
-                    'email': email,
-                    'phone': phone,
-                    'jenis_kelamin':jenis_kelamin,
-                    'tanggal_lahir': tanggal_lahir,
-                    'photo': photo_filename
-                }
-            }
-        )
+            # Simpan ke static/profil_user/ (disimpan sekali per isi file, lihat storage.py)
+            try:
+                photo_filename = 'profil_user/' + store_upload(db, photo, 'profil')
+            except UploadError as e:
+                flash(f'Foto tidak valid. {e}', 'danger')
+                return redirect(url_for('profil'))
+
+        doc = {
+            'name': name,
+            'email': email,
+            'phone': phone,
+            'jenis_kelamin':jenis_kelamin,
+            'tanggal_lahir': tanggal_lahir,
+        }
+        if photo_filename:
+            doc['photo'] = photo_filename
+
+        # Update data pengguna di database; foto lama dibaca dari dokumen yang diganti
+        # (bukan dari cache pengguna yang bisa tertinggal di worker lain)
+        try:
+            old = db.users.find_one_and_update({'_id': ObjectId(user_id)}, {'$set': doc}, projection={'photo': 1})
+        except DuplicateKeyError:
+            if photo_filename:
+                release(db, 'profil', photo_filename.removeprefix('profil_user/'))
+            flash('Email sudah dipakai akun lain.', 'danger')
+            return redirect(url_for('profil'))
+        invalidate_user(user_id)
+        # store_upload selalu menambah refs, jadi foto lama dilepas meskipun isinya sama
+        if photo_filename and old:
+            release(db, 'profil', (old.get('photo') or '').removeprefix('profil_user/'))
         flash('Profil berhasil diperbarui!', 'success')
         return redirect(url_for('profil'))
 
@@ -394,41 +692,134 @@ def admin_login():
 @app.route('/adminDashboard')
 @login_required(role='admin')
 def admin_dashboard():
-    return render_template('admin_dashboard.html', admin=session['admin'])
+    return render_template('admin_dashboard.html', admin=session['admin'], order_statuses=ORDER_STATUSES)
 
 
 @app.route('/totals', methods=['GET'])
 @login_required(role='admin')
 def get_totals():
-    total_customers = db.users.count_documents({})
-    total_products = db.products.count_documents({})
-    total_orders = db.orders.count_documents({})
-    
+    # Dibaca dari penghitung tersimpan (counters.py), bukan count_documents
+    return jsonify(read_totals(db))
+
+@app.route('/admin/db-pool', methods=['GET'])
+@login_required(role='admin')
+def db_pool_stats():
+    """Statistik pool koneksi Mongo worker ini (untuk menentukan MONGO_MAX_POOL_SIZE)."""
+    return jsonify(pool_stats.snapshot())
+
+@app.route('/admin/jobs', methods=['GET'])
+@login_required(role='admin')
+def admin_jobs():
+    """Jumlah job latar belakang per status dan job gagal terakhir (jobs.py)."""
+    return jsonify(job_stats(db))
+
+@app.route('/admin/report', methods=['GET'])
+@login_required(role='admin')
+def admin_report():
+    """Laporan penjualan dari koleksi rekap (rollups.py).
+
+    Query: period=day|month, dim=produk|ukuran|status|metode_pembayaran,
+    start/end dalam format bucket (default 30 hari / 12 bulan terakhir).
+    """
+    period = request.args.get('period', 'day')
+    dim = request.args.get('dim', 'produk')
+    if period not in PERIODS or dim not in DIMENSIONS:
+        return jsonify({'error': 'period atau dim tidak valid'}), 400
+
+    now = datetime.now()
+    default_start = now - timedelta(days=29) if period == 'day' else now.replace(day=1) - timedelta(days=334)
+    start = request.args.get('start', default_start.strftime(PERIODS[period]))
+    end = request.args.get('end', now.strftime(PERIODS[period]))
+    limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+    return jsonify(report(db, period, dim, start, end, limit))
+
+@app.route('/admin/status-time', methods=['GET'])
+@login_required(role='admin')
+def admin_status_time():
+    """Lama pesanan di tiap status (dari status_events) untuk dashboard SLA.
+
+    Query: start/end (YYYY-MM-DD, default 30 hari terakhir), sla_hours (default 24)
+    untuk menghitung pesanan yang tertahan lebih lama dari itu di status saat ini.
+    """
+    try:
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d') + timedelta(days=1) if request.args.get('end') \
+            else datetime.now()
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d') if request.args.get('start') \
+            else end - timedelta(days=30)
+    except ValueError:
+        return jsonify({'error': 'Format start/end harus YYYY-MM-DD'}), 400
+    sla_hours = request.args.get('sla_hours', 24, type=float)
     return jsonify({
-        'total_customers': total_customers,
-        'total_products': total_products,
-        'total_orders': total_orders
+        'start': start, 'end': end, 'sla_hours': sla_hours,
+        'time_in_status': time_in_status(db, start, end),
+        'stuck': stuck_orders(db, timedelta(hours=sla_hours)),
     })
 
+@app.route('/admin/orders/<string:order_id>/events', methods=['GET'])
+@login_required(role='admin')
+def admin_order_events(order_id):
+    """Riwayat status satu pesanan."""
+    if not ObjectId.is_valid(order_id):
+        return jsonify({'error': 'Pesanan tidak ditemukan'}), 404
+    return jsonify(order_timeline(db, order_id))
+
+def _export_response(chunks, name, fmt):
+    filename = f"{name}-{datetime.now():%Y%m%d-%H%M%S}.{fmt}"
+    return Response(
+        stream_with_context(chunks),
+        mimetype=FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"', 'Cache-Control': 'no-store'}
+    )
+
+
+@app.route('/admin/export/orders', methods=['GET'])
+@login_required(role='admin')
+def export_data_pemesanan():
+    """Ekspor pesanan (streaming). Query: format=csv|ndjson, start, end (YYYY-MM-DD), status (boleh berulang)."""
+    fmt = request.args.get('format', 'csv')
+    try:
+        if fmt not in FORMATS:
+            raise ExportError('Format harus csv atau ndjson.')
+        query = order_query(request.args.get('start'), request.args.get('end'),
+                            [s for s in request.args.getlist('status') if s])
+    except (ExportError, OrderFilterError) as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('adminDaftarPemesanan'))
+    return _export_response(export_orders(db, fmt, query), 'pesanan', fmt)
+
+
+@app.route('/admin/export/customers', methods=['GET'])
+@login_required(role='admin')
+def export_data_pelanggan():
+    """Ekspor pelanggan (streaming, tanpa password). Query: format=csv|ndjson."""
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        flash('Format harus csv atau ndjson.', 'danger')
+        return redirect(url_for('adminPelanggan'))
+    return _export_response(export_customers(db, fmt), 'pelanggan', fmt)
+
 #DATA PELANGGAN
 @app.route('/adminPelanggan', methods=['GET'])
 @login_required(role='admin')
 def adminPelanggan():
     admin = db.admin.find_one({'_id': ObjectId(session.get('admin_id'))})
-    users = db.users.find()
-    page = int(request.args.get('page', 1))
-    per_page = 5
-    total_users = users_collection.count_documents({})
-    total_pages = (total_users + per_page - 1) // per_page
-
-    users = list(users_collection.find().skip((page - 1) * per_page).limit(per_page))
-    return render_template('adminPelanggan.html', users=users, page=page, total_pages=total_pages, admin=admin)
+    pagination = paginate(
+        users_collection,
+        projection={'password': 0},
+        cursor=request.args.get('cursor'),
+        per_page=get_per_page(app.config['PER_PAGE'])
+    )
+    return render_template('adminPelanggan.html', users=pagination.items, pagination=pagination, admin=admin)
 
 
 @app.route('/hapusDataPelanggan/<string:_id>', methods=["GET", "POST"])
 @login_required(role='admin')
 def hapus_data_pelanggan(_id):
-    db.users.delete_one({'_id': ObjectId(_id)})
+    user = db.users.find_one_and_delete({'_id': ObjectId(_id)}, projection={'photo': 1})
+    invalidate_user(_id)
+    if user:
+        count_user(db, -1)
+        release(db, 'profil', user.get('photo', '').removeprefix('profil_user/'))
     flash('Akun pelanggan berhasil dihapus!', 'success')  # Tambahkan flash message
     return redirect(url_for('adminPelanggan'))
 #AKHIR DATA PELANGGAN
@@ -438,8 +829,9 @@ def hapus_data_pelanggan(_id):
 @login_required(role='admin')
 def adminProduk():
     admin = db.admin.find_one({'_id': ObjectId(session.get('admin_id'))})
-    products = db.products.find()
-    return render_template('adminProduk.html', products=products, admin=admin)
+    products = all_products(db)
+    return render_template('adminProduk.html', products=products, admin=admin,
+                           categories=search_index(db).categories)
 
 
 @app.route('/tambahDataProduk', methods=['GET', 'POST'])
@@ -457,6 +849,13 @@ def tambah_data_produk():
         if not kategori or not namaProduk or not deskripsi or not ukuran or not hargaPcs or not photo:
             flash('Semua bidang harus diisi!', 'error')  # Tambahkan flash message
             # return "Semua bidang harus diisi!", 400
+
+        # Validasi harga sebelum gambar disimpan
+        try:
+            dus_harga_list = pricing_from_form(request.form)
+        except PricingError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('tambah_data_produk'))
         
         # Validasi ekstensi file
         if not allowed_file_admin(photo.filename):
@@ -465,14 +864,13 @@ def tambah_data_produk():
             # return "Jenis file tidak diizinkan!", 400
 
 
-        # Membuat nama file gambar dengan timestamp
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")  # Format timestamp
-        nama_file_asli = photo.filename
-        nama_file_gambar = f"{timestamp}_{secure_filename(nama_file_asli)}"  # Menambahkan timestamp pada nama file gambar
-        file_path = f'./static/assets/imgProduk/{nama_file_gambar}'
-        photo.save(file_path)
+        # Simpan gambar produk (disimpan sekali per isi file, lihat storage.py)
+        try:
+            nama_file_gambar = store_upload(db, photo, 'produk')
+        except UploadError as e:
+            flash(f'File gambar tidak valid. {e}', 'danger')
+            return redirect(url_for('tambah_data_produk'))
 
-        dus_harga_list = [{'ukuran': u, 'hargaPcs': h} for u, h in zip(ukuran, hargaPcs)]
         doc = {
             'kategori': kategori,
             'nama_produk': namaProduk,
@@ -482,6 +880,8 @@ def tambah_data_produk():
         }
 
         db.products.insert_one(doc)
+        count_product(db)
+        invalidate_catalog()
         flash('Produk berhasil ditambahkan!', 'success')  # Tambahkan flash message
         return redirect(url_for("adminProduk"))
 
@@ -496,19 +896,23 @@ def edit_data_produk(_id):
         kategori = request.form['kategori']
         namaProduk = request.form['namaProduk']
         deskripsi = request.form['deskripsi']
-        ukuran = request.form.getlist('ukuran[]')
-        hargaPcs = request.form.getlist('hargaPcs[]')
         photo = request.files.get('photo')
-        
+
+        try:
+            dus_harga_list = pricing_from_form(request.form)
+        except PricingError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('edit_data_produk', _id=_id))
+
         nama_file_gambar = None
         if photo and photo.filename:
             # Check if the file is allowed (assuming you have an allowed_file function)
             if photo and allowed_file_admin(photo.filename):
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                nama_file_asli = photo.filename
-                nama_file_gambar = f"{timestamp}_{secure_filename(nama_file_asli)}"
-                file_path = f'./static/assets/imgProduk/{nama_file_gambar}'
-                photo.save(file_path)
+                try:
+                    nama_file_gambar = store_upload(db, photo, 'produk')
+                except UploadError as e:
+                    flash(f'File gambar tidak valid. {e}', 'danger')
+                    return redirect(url_for('edit_data_produk', _id=_id))
             else:
                 flash('File gambar tidak valid. Format yang diperbolehkan: png, jpg, jpeg!', 'danger')
                 return redirect(url_for('edit_data_produk', _id=_id))
@@ -517,12 +921,16 @@ def edit_data_produk(_id):
             'kategori': kategori,
             'nama_produk': namaProduk,
             'deskripsi': deskripsi,
-            'dus_harga': [{'ukuran': u, 'hargaPcs': h} for u, h in zip(ukuran, hargaPcs)]
+            'dus_harga': dus_harga_list
         }
         if nama_file_gambar:
             doc['photo'] = nama_file_gambar
 
-        db.products.update_one({'_id': ObjectId(_id)}, {'$set': doc})
+        old = db.products.find_one_and_update({'_id': ObjectId(_id)}, {'$set': doc}, projection={'photo': 1})
+        invalidate_catalog()
+        # store_upload selalu menambah refs, jadi gambar lama dilepas meskipun isinya sama
+        if nama_file_gambar and old:
+            release(db, 'produk', old.get('photo'))
         flash('Produk berhasil diperbarui!', 'success')  # Tambahkan flash message
         return redirect(url_for('adminProduk'))
 
@@ -533,7 +941,11 @@ def edit_data_produk(_id):
 @app.route('/hapusDataProduk/<string:_id>', methods=["GET", "POST"])
 @login_required(role='admin')
 def hapus_data_produk(_id):
-    db.products.delete_one({'_id': ObjectId(_id)})
+    produk = db.products.find_one_and_delete({'_id': ObjectId(_id)}, projection={'photo': 1})
+    invalidate_catalog()
+    if produk:
+        count_product(db, -1)
+        release(db, 'produk', produk.get('photo'))
     flash('Produk berhasil dihapus!', 'success')  # Tambahkan flash message
     return redirect(url_for('adminProduk'))
 #AKHIR DATA PRODUK
@@ -544,14 +956,12 @@ def hapus_data_produk(_id):
 @login_required(role='admin')
 def adminPembayaran():
     admin = db.admin.find_one({'_id': ObjectId(session.get('admin_id'))})
-    pembayaran = db.pembayaran.find()
-    page = int(request.args.get('page', 1))
-    per_page = 5
-    total_products = db.pembayaran.count_documents({})
-    total_pages = (total_products + per_page - 1) // per_page
-
-    pembayaran = list(db.pembayaran.find().skip((page - 1) * per_page).limit(per_page))
-    return render_template('adminPembayaran.html', pembayaran=pembayaran, page=page, total_pages=total_pages, admin=admin)
+    pagination = paginate(
+        db.pembayaran,
+        cursor=request.args.get('cursor'),
+        per_page=get_per_page(app.config['PER_PAGE'])
+    )
+    return render_template('adminPembayaran.html', pembayaran=pagination.items, pagination=pagination, admin=admin)
 
 
 @app.route('/tambahDataPembayaran', methods=['GET', 'POST'])
@@ -612,56 +1022,38 @@ def hapus_data_pembayaran(_id):
 @login_required(role='admin')
 def adminDaftarPemesanan():
     admin = db.admin.find_one({'_id': ObjectId(session.get('admin_id'))})
-    page = int(request.args.get('page', 1))
-    per_page = 5
-    
-    # Definisi status pesanan yang mungkin
-    order_statuses = [
-        'Konfirmasi', 
-        'Diproses', 
-        'Dikirim', 
-        'Selesai', 
-        'Dibatalkan'
-    ]
-    
-    # Hitung total pesanan
-    total_orders = db.orders.count_documents({})
-    total_pages = (total_orders + per_page - 1) // per_page
-    
-    # Ambil pesanan dengan pagination
-    orders = list(db.orders.find().sort('tanggal_pemesanan', -1).skip((page - 1) * per_page).limit(per_page))
+    # Ambil pesanan dengan pagination cursor (index tanggal_pemesanan_id)
+    pagination = paginate(
+        reporting(db.orders),
+        sort=[('tanggal_pemesanan', -1), ('_id', -1)],
+        cursor=request.args.get('cursor'),
+        per_page=get_per_page(app.config['PER_PAGE'])
+    )
+    orders = pagination.items
     
-    # Tambahkan informasi pengguna untuk setiap pesanan
-    for order in orders:
-        user = db.users.find_one({'_id': order['user_id']})
-        order['user_name'] = user['name'] if user else 'Pengguna Tidak Dikenal'
+    # Tambahkan informasi pengguna untuk semua pesanan dalam satu query
+    attach_users(db, orders)
     
     return render_template(
         'adminDaftarPemesanan.html', 
         orders=orders, 
-        page=page, 
-        total_pages=total_pages, 
+        pagination=pagination, 
         admin=admin,
-        order_statuses=order_statuses
+        order_statuses=ORDER_STATUSES
     )
 
 @app.route('/adminDetailPemesanan/<string:order_id>', methods=['GET'])
 @login_required(role='admin')
 def admin_detail_pemesanan(order_id):
-    # Ambil data pesanan berdasarkan order_id
-    order = db.orders.find_one({'_id': ObjectId(order_id)})
+    # Ambil pesanan beserta pengguna dan produknya dalam satu query
+    order, user = get_order_detail(db, order_id)
 
     if not order:
         flash('Pesanan tidak ditemukan.', 'danger')
         return redirect(url_for('adminDaftarPemesanan'))
 
-    # Ambil informasi pengguna
-    user = db.users.find_one({'_id': order['user_id']})
-    
-    # Ambil informasi produk
-    produk = db.products.find_one({'_id': order['produk_id']})
-
-    return render_template('adminDetailPemesanan.html', order=order, user=user, produk=produk)
+    return render_template('adminDetailPemesanan.html', order=order, user=user,
+                           events=order_timeline(db, order_id))
 
 @app.route('/update_order_status', methods=['POST'])
 @login_required(role='admin')
@@ -672,18 +1064,15 @@ def update_order_status():
         new_status = request.form.get('new_status')
         
         # Validasi input
-        if not order_id or not new_status:
+        if not order_id or new_status not in ORDER_STATUSES:
             flash('Invalid order ID or status', 'error')
             return redirect(url_for('adminDaftarPemesanan'))
         
-        # Update order status di database
-        result = db.orders.update_one(
-            {'_id': ObjectId(order_id)},
-            {'$set': {'status': new_status}}
-        )
+        # Update order status di database (penghitung, rekap, dan riwayat status ikut diperbarui)
+        before = change_status(db, order_id, new_status, actor=f"admin:{session['admin']}", source='admin')
         
         # Cek jika status di perbarui
-        if result.modified_count > 0:
+        if before:
             flash('Status pemesanan berhasil diperbarui!', 'success')
         else:
             flash('Tidak ada pesanan yang ditemukan atau status tidak berubah!', 'warning')
@@ -700,21 +1089,21 @@ def update_order_status():
 @login_required(role='admin')
 def hapus_data_pemesanan(order_id):
     try:
-        # Cek apakah pesanan ada
-        order = db.orders.find_one({'_id': ObjectId(order_id)})
+        # Hapus pesanan dari database (sekaligus cek apakah pesanan ada)
+        order = db.orders.find_one_and_delete(
+            {'_id': ObjectId(order_id)},
+            projection={'desain': 1, 'bukti_pembayaran': 1, **ORDER_FIELDS}
+        )
         
         if not order:
             flash('Pesanan tidak ditemukan.', 'danger')
             return redirect(url_for('adminDaftarPemesanan'))
-        
-        # Hapus pesanan dari database
-        result = db.orders.delete_one({'_id': ObjectId(order_id)})
-        
-        # Cek apakah penghapusan berhasil
-        if result.deleted_count > 0:
-            flash('Pesanan berhasil dihapus!', 'success')
-        else:
-            flash('Gagal menghapus pesanan.', 'error')
+
+        count_order(db, order.get('status'), -1)
+        record_order(db, order, -1)
+        release_many(db, [('desain', key) for key in design_files(order)]
+                     + [('bukti', order.get('bukti_pembayaran'))])
+        flash('Pesanan berhasil dihapus!', 'success')
         
         return redirect(url_for('adminDaftarPemesanan'))
     
@@ -724,20 +1113,52 @@ def hapus_data_pemesanan(order_id):
         flash('Terjadi kesalahan saat menghapus pesanan', 'error')
         return redirect(url_for('adminDaftarPemesanan'))
 
+def _bulk_response(results, message):
+    """Ringkasan hasil aksi massal; juga di-flash untuk halaman setelah reload."""
+    summary = {}
+    for result in results.values():
+        summary[result] = summary.get(result, 0) + 1
+    done = summary.get('updated', 0) + summary.get('deleted', 0)
+    flash(message.format(done=done, total=len(results)), 'success' if done else 'warning')
+    return jsonify({'results': results, 'summary': summary})
+
+
+@app.route('/admin/orders/bulk-status', methods=['POST'])
+@login_required(role='admin')
+def bulk_update_order_status():
+    """Body JSON: {"ids": [...]} atau {"filter": {"status", "start", "end"}}, plus "new_status"."""
+    data = request.get_json(silent=True) or {}
+    try:
+        results = bulk_update_status(db, data.get('new_status'), data.get('ids'), data.get('filter'),
+                                     actor=f"admin:{session['admin']}")
+    except (BulkError, OrderFilterError) as e:
+        return jsonify({'error': str(e)}), 400
+    return _bulk_response(results, '{done} dari {total} pesanan diperbarui.')
+
+
+@app.route('/admin/orders/bulk-delete', methods=['POST'])
+@login_required(role='admin')
+def bulk_delete_orders():
+    """Body JSON: {"ids": [...]} atau {"filter": {"status", "start", "end"}}."""
+    data = request.get_json(silent=True) or {}
+    try:
+        results = bulk_delete(db, data.get('ids'), data.get('filter'))
+    except (BulkError, OrderFilterError) as e:
+        return jsonify({'error': str(e)}), 400
+    return _bulk_response(results, '{done} dari {total} pesanan dihapus.')
+
 # route data admin start
 @app.route('/adminDataAdmin')
 @login_required(role='admin')
 def adminDataAdmin():
-        admin = db.admins.find_one({'_id': ObjectId(session.get('admin_id'))})
-        admin = db.admins.find()
-        page = int(request.args.get('page', 1))
-        per_page = 5  # Number of products per page
-        total_admin = db.admins.count_documents({})
-        total_pages = (total_admin + per_page - 1) // per_page
-
-        admin = list(db.admins.find().skip((page - 1) * per_page).limit(per_page))
+        pagination = paginate(
+            db.admins,
+            projection={'password': 0},
+            cursor=request.args.get('cursor'),
+            per_page=get_per_page(app.config['PER_PAGE'])
+        )
 
-        return render_template('adminDataAdmin.html', admin=admin, page=page, total_pages=total_pages)
+        return render_template('adminDataAdmin.html', admin=pagination.items, pagination=pagination)
 
 @app.route('/tambahDataAdmin', methods=['GET', 'POST'])
 @login_required(role='admin')
@@ -767,7 +1188,11 @@ def tambah_data_admin():
             "password": hashed_password  # Ganti "admin123" dengan kata sandi admin
         }
         
-        db.admins.insert_one(doc)
+        try:
+            db.admins.insert_one(doc)
+        except DuplicateKeyError:
+            flash('Email sudah terdaftar.', 'danger')
+            return redirect(url_for('tambah_data_admin'))
         flash('Akun admin berhasil ditambahkan!', 'success')
         return redirect(url_for("adminDataAdmin"))
         
@@ -789,7 +1214,11 @@ def edit_data_admin(_id):
         }
         
         # Update database
-        db.admins.update_one({'_id': ObjectId(_id)}, {'$set': doc})
+        try:
+            db.admins.update_one({'_id': ObjectId(_id)}, {'$set': doc})
+        except DuplicateKeyError:
+            flash('Email sudah dipakai admin lain.', 'danger')
+            return redirect(url_for('edit_data_admin', _id=_id))
         flash('Data admin berhasil diperbarui!', 'success')
         return redirect(url_for('adminDataAdmin'))
     
@@ -815,5 +1244,8 @@ def admin_logout():
 #AKHIR BAGIAN ADMIN
 
 if __name__ == '__main__':
+    # Server development; untuk produksi pakai gunicorn (lihat wsgi.py)
+    # Pastikan index tersedia sebelum melayani request (idempoten)
+    ensure_indexes(db)
     app.run('0.0.0.0', port=5000, debug=True)
 
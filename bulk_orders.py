@@ -0,0 +1,133 @@
+"""Ubah status dan hapus banyak pesanan sekaligus (halaman admin daftar pesanan).
+
+Pesanan dipilih lewat daftar id atau filter (status/rentang tanggal). Perubahan
+status (find_one_and_update bersyarat status lama) dan penghapusan dilakukan per
+pesanan supaya hanya pesanan yang benar-benar diubah/terhapus oleh aksi ini yang
+dihitung. Penghitung
+dashboard, rekap laporan, riwayat status, dan refcount file diperbarui per batch.
+
+Hasil dikembalikan per id:
+- `updated` / `deleted`: berhasil
+- `unchanged`: status pesanan sudah sama
+- `not_found`: id tidak valid atau pesanan tidak ada
+- `conflict`: status pesanan diubah admin lain di antara baca dan tulis
+"""
+from datetime import datetime
+
+from bson import ObjectId
+
+from counters import move_order_statuses, uncount_orders
+from orders import ORDER_STATUSES, design_files, order_query
+from rollups import ORDER_FIELDS, record_orders, record_status_changes
+from status_events import STATUS_FIELDS, record_events
+from storage import release_many
+
+# Batas jumlah pesanan per aksi massal
+MAX_BULK = 500
+
+
+class BulkError(ValueError):
+    """Permintaan aksi massal tidak valid; pesan siap ditampilkan ke admin."""
+
+
+def _parse_ids(ids):
+    """Pisahkan id valid (ObjectId) dan id yang tidak valid."""
+    valid, invalid = [], []
+    for order_id in ids:
+        if isinstance(order_id, str) and ObjectId.is_valid(order_id):
+            valid.append(ObjectId(order_id))
+        else:
+            invalid.append(str(order_id))
+    return list(dict.fromkeys(valid)), invalid
+
+
+def select_orders(db, ids=None, filters=None, projection=None):
+    """Ambil pesanan target. Kembalikan (daftar pesanan, id yang tidak ditemukan)."""
+    if ids:
+        object_ids, missing = _parse_ids(ids)
+        if len(object_ids) > MAX_BULK:
+            raise BulkError(f'Maksimal {MAX_BULK} pesanan per aksi.')
+        orders = list(db.orders.find({'_id': {'$in': object_ids}}, projection))
+        found = {order['_id'] for order in orders}
+        missing += [str(order_id) for order_id in object_ids if order_id not in found]
+        return orders, missing
+
+    if filters:
+        statuses = filters.get('status') or []
+        if isinstance(statuses, str):
+            statuses = [statuses]
+        query = order_query(filters.get('start'), filters.get('end'), statuses)
+        if not query:
+            raise BulkError('Filter tidak boleh kosong.')
+        orders = list(db.orders.find(query, projection).limit(MAX_BULK + 1))
+        if len(orders) > MAX_BULK:
+            raise BulkError(f'Filter cocok dengan lebih dari {MAX_BULK} pesanan; persempit filternya.')
+        return orders, []
+
+    raise BulkError('Pilih minimal satu pesanan.')
+
+
+def bulk_update_status(db, new_status, ids=None, filters=None, actor=None):
+    """Ubah status banyak pesanan. Kembalikan dict id -> hasil."""
+    if new_status not in ORDER_STATUSES:
+        raise BulkError('Status tidak valid.')
+    orders, missing = select_orders(db, ids, filters, {**ORDER_FIELDS, **STATUS_FIELDS})
+    results = {order_id: 'not_found' for order_id in missing}
+
+    pending = []
+    for order in orders:
+        if order.get('status') == new_status:
+            results[str(order['_id'])] = 'unchanged'
+        else:
+            pending.append(order)
+
+    if pending:
+        now = datetime.now()
+        changes = []
+        for order in pending:
+            order_id = str(order['_id'])
+            # Hanya diubah jika status belum berubah sejak dibaca; dokumen yang dikembalikan = yang diubah aksi ini
+            before = db.orders.find_one_and_update(
+                {'_id': order['_id'], 'status': order.get('status')},
+                {'$set': {'status': new_status, 'status_since': now}},
+                projection={**ORDER_FIELDS, **STATUS_FIELDS}
+            )
+            if before:
+                results[order_id] = 'updated'
+                changes.append((before, before.get('status'), new_status))
+            elif db.orders.count_documents({'_id': order['_id']}, limit=1):
+                results[order_id] = 'conflict'
+            else:
+                results[order_id] = 'not_found'
+
+        move_order_statuses(db, [(old, new) for _, old, new in changes])
+        record_status_changes(db, changes)
+        record_events(db, changes, now, actor, 'bulk')
+    return results
+
+
+def bulk_delete(db, ids=None, filters=None):
+    """Hapus banyak pesanan beserta referensi file-nya. Kembalikan dict id -> hasil."""
+    projection = {'desain': 1, 'bukti_pembayaran': 1, **ORDER_FIELDS}
+    orders, missing = select_orders(db, ids, filters, projection)
+    results = {order_id: 'not_found' for order_id in missing}
+    if not orders:
+        return results
+
+    deleted = []
+    for order in orders:
+        # Pesanan yang sudah dihapus di antara baca dan hapus (admin lain / kiriman ganda) tidak dihitung lagi
+        if db.orders.delete_one({'_id': order['_id']}).deleted_count:
+            results[str(order['_id'])] = 'deleted'
+            deleted.append(order)
+        else:
+            results[str(order['_id'])] = 'not_found'
+    orders = deleted
+    if not orders:
+        return results
+
+    uncount_orders(db, [order.get('status') for order in orders])
+    record_orders(db, orders, -1)
+    release_many(db, [('desain', key) for order in orders for key in design_files(order)]
+                 + [('bukti', order.get('bukti_pembayaran')) for order in orders])
+    return results
@@ -0,0 +1,54 @@
+"""Cache kecil di dalam proses (per worker) dengan batas ukuran (LRU) dan TTL."""
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Cache LRU thread-safe; entri kadaluarsa setelah `ttl` detik.
+
+    `ttl=0` atau `maxsize=0` mematikan cache (get selalu miss).
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key, default=None):
+        if not self.enabled:
+            return default
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
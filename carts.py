@@ -0,0 +1,163 @@
+"""Keranjang belanja di server (koleksi `carts`, satu dokumen per pengguna).
+
+    {'_id': user_id,
+     'items': [{'item_id': 'a1b2c3d4e5f6', 'produk_id': ObjectId(...), 'nama_produk': 'Kartu Nama',
+                'ukuran': 'A4', 'jumlah': 100, 'desain': '<key storage>', 'desain_nama': 'kartu.pdf',
+                'keterangan': '', 'form_key': '...', 'added_at': datetime(...)}],
+     'updated_at': datetime(...)}
+
+File desain disimpan (storage.py, area `desain`) saat barang masuk keranjang.
+Referensinya pindah ke pesanan saat checkout, atau dilepas saat barang
+dihapus dari keranjang. Harga tidak disimpan di keranjang: halaman keranjang
+dan checkout menghitung dari tabel harga snapshot katalog (catalog.price_maps);
+checkout tetap memastikan produknya masih ada di database.
+
+Checkout menulis satu dokumen pesanan induk dengan `items` (satu insert,
+atomic tanpa transaksi multi-dokumen) dan satu bukti pembayaran untuk semua
+barang, lalu mengeluarkan barang yang dipesan dari keranjang. Field ringkasan
+(`nama_produk`, `jumlah`, `total_biaya`) tetap ada di pesanan induk sehingga
+daftar pesanan, penghitung, dan rekap tidak perlu membuka `items`.
+"""
+import os
+import uuid
+from datetime import datetime
+
+from pymongo.errors import DuplicateKeyError
+
+from catalog import price_maps
+from idempotency import FIELD as IDEMPOTENCY_FIELD
+from pricing import quote, unit_price
+
+MAX_ITEMS = int(os.environ.get('CART_MAX_ITEMS', 20))
+
+
+class CartError(ValueError):
+    """Aksi keranjang ditolak; pesan siap ditampilkan ke pengguna."""
+
+
+def get_items(db, user_id):
+    """Barang di keranjang pengguna, urut saat dimasukkan."""
+    cart = db.carts.find_one({'_id': user_id}, {'items': 1})
+    return cart['items'] if cart else []
+
+
+def add_item(db, user_id, produk, ukuran, jumlah, desain=None, desain_nama=None, keterangan='', form_key=None):
+    """Masukkan satu barang ke keranjang; kembalikan (item, baru).
+
+    Formulir yang sama dikirim ulang (`form_key` sama) tidak menambah barang lagi;
+    `baru` False dan pemanggil melepas file desain yang baru disimpan.
+    """
+    now = datetime.now()
+    item = {
+        'item_id': uuid.uuid4().hex[:12],
+        'produk_id': produk['_id'],
+        'nama_produk': produk['nama_produk'],
+        'ukuran': ukuran,
+        'jumlah': jumlah,
+        'desain': desain,
+        'desain_nama': desain_nama,
+        'keterangan': keterangan,
+        'form_key': form_key,
+        'added_at': now,
+    }
+    query = {'_id': user_id, f'items.{MAX_ITEMS - 1}': {'$exists': False}}
+    if form_key:
+        query['items.form_key'] = {'$ne': form_key}
+    try:
+        # Keranjang penuh / formulir ganda: filter tidak cocok, upsert bentrok di _id
+        db.carts.update_one(query, {'$push': {'items': item}, '$set': {'updated_at': now}}, upsert=True)
+    except DuplicateKeyError:
+        existing = [i for i in get_items(db, user_id) if form_key and i.get('form_key') == form_key]
+        if existing:
+            return existing[0], False
+        raise CartError(f'Keranjang penuh (maksimal {MAX_ITEMS} barang).')
+    return item, True
+
+
+def update_quantity(db, user_id, item_id, jumlah):
+    """Ubah jumlah satu barang. Kembalikan True jika barangnya ada."""
+    if jumlah < 1:
+        raise CartError('Jumlah minimal 1.')
+    result = db.carts.update_one({'_id': user_id, 'items.item_id': item_id},
+                                 {'$set': {'items.$.jumlah': jumlah, 'updated_at': datetime.now()}})
+    return result.matched_count > 0
+
+
+def remove_item(db, user_id, item_id):
+    """Keluarkan satu barang dari keranjang; kembalikan barang tersebut (atau None)."""
+    before = db.carts.find_one_and_update(
+        {'_id': user_id, 'items.item_id': item_id},
+        {'$pull': {'items': {'item_id': item_id}}, '$set': {'updated_at': datetime.now()}},
+        projection={'items': {'$elemMatch': {'item_id': item_id}}}
+    )
+    return before['items'][0] if before and before.get('items') else None
+
+
+def price_items(db, items):
+    """Harga tampilan keranjang dari snapshot katalog (lihat pricing.quote)."""
+    if not items:
+        return {'lines': [], 'total': 0}
+    lines = [{'produk_id': str(item['produk_id']), 'ukuran': item['ukuran'], 'jumlah': item['jumlah']}
+             for item in items]
+    return quote(price_maps(db), lines)
+
+
+def build_order(db, user_id, items, opsi_pengiriman, alamat, metode_pembayaran, idempotency_key, now):
+    """Dokumen pesanan induk dari barang keranjang, dengan harga dari snapshot katalog."""
+    products = {p['_id']: p for p in db.products.find({'_id': {'$in': list({i['produk_id'] for i in items})}},
+                                                       {'nama_produk': 1})}
+    prices = price_maps(db)
+    lines = []
+    for item in items:
+        produk = products.get(item['produk_id'])
+        if produk is None:
+            raise CartError(f"{item['nama_produk']} sudah tidak tersedia, hapus dari keranjang.")
+        harga_per_satuan = unit_price(prices.get(str(produk['_id']), {}), item['ukuran'], item['jumlah'])
+        if harga_per_satuan is None:
+            raise CartError(f"Ukuran {item['ukuran']} untuk {produk['nama_produk']} sudah tidak tersedia.")
+        lines.append({
+            'item_id': item['item_id'],
+            'produk_id': produk['_id'],
+            'nama_produk': produk['nama_produk'],
+            'ukuran': item['ukuran'],
+            'jumlah': item['jumlah'],
+            'harga_per_satuan': harga_per_satuan,
+            'subtotal': harga_per_satuan * item['jumlah'],
+            'desain': item.get('desain'),
+            'desain_nama': item.get('desain_nama'),
+            'keterangan': item.get('keterangan'),
+        })
+
+    return {
+        'user_id': user_id,
+        'items': lines,
+        'nama_produk': ', '.join(dict.fromkeys(line['nama_produk'] for line in lines)),
+        'jumlah': sum(line['jumlah'] for line in lines),
+        'total_biaya': sum(line['subtotal'] for line in lines),
+        'opsi_pengiriman': opsi_pengiriman,
+        'alamat': alamat if opsi_pengiriman == 'Antar ke lokasi' else None,
+        'metode_pembayaran': metode_pembayaran,
+        'status': 'Konfirmasi',
+        'tanggal_pemesanan': now,
+        'status_since': now,
+        IDEMPOTENCY_FIELD: idempotency_key,
+    }
+
+
+def checkout(db, user_id, opsi_pengiriman, alamat, metode_pembayaran, idempotency_key):
+    """Buat satu pesanan dari seluruh isi keranjang; kembalikan dokumen pesanan (sudah punya `_id`).
+
+    DuplicateKeyError (checkout ganda dengan kunci idempotensi yang sama) diteruskan ke
+    pemanggil; keranjang tidak diubah dan file desain tetap milik pesanan pertama.
+    """
+    items = get_items(db, user_id)
+    if not items:
+        raise CartError('Keranjang masih kosong.')
+    now = datetime.now()
+    order = build_order(db, user_id, items, opsi_pengiriman, alamat, metode_pembayaran, idempotency_key, now)
+    db.orders.insert_one(order)
+    # Hanya barang yang ikut dipesan; barang yang ditambahkan bersamaan tetap di keranjang
+    db.carts.update_one({'_id': user_id},
+                        {'$pull': {'items': {'item_id': {'$in': [item['item_id'] for item in items]}}},
+                         '$set': {'updated_at': now}})
+    return order
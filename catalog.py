@@ -0,0 +1,158 @@
+"""Cache katalog produk.
+
+Katalog hanya berubah lewat route admin produk (tambah/edit/hapus), jadi
+halaman publik cukup membaca snapshot yang disimpan di cache. Setiap snapshot
+punya `version` (hash isi katalog) yang juga dipakai untuk ETag.
+
+Backend dipilih lewat env CATALOG_CACHE_BACKEND:
+- `memory` (default): per worker; worker lain melihat perubahan paling
+  lambat setelah CATALOG_CACHE_TTL detik.
+- `file`: disimpan di CATALOG_CACHE_PATH dan dipakai bersama oleh semua
+  worker di satu mesin; invalidasi langsung terlihat di semua worker.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+import bson
+
+from database import reporting
+from pricing import price_map
+
+CATALOG_CACHE_TTL = float(os.environ.get('CATALOG_CACHE_TTL', 300))
+
+
+class MemoryBackend:
+    """Snapshot disimpan di memori proses."""
+
+    def __init__(self):
+        self._snapshot = None
+
+    def load(self):
+        return self._snapshot
+
+    def store(self, snapshot):
+        self._snapshot = snapshot
+
+    def clear(self):
+        self._snapshot = None
+
+
+class FileBackend:
+    """Snapshot disimpan di file lokal yang dibaca bersama oleh semua worker.
+
+    Salinan di memori dipakai selama mtime file tidak berubah, jadi tiap
+    request hanya butuh satu `os.stat`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._snapshot = None
+        self._mtime = None
+
+    def load(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            self._snapshot = self._mtime = None
+            return None
+        if mtime != self._mtime:
+            try:
+                with open(self.path, 'rb') as f:
+                    self._snapshot = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                return None
+            self._mtime = mtime
+        return self._snapshot
+
+    def store(self, snapshot):
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.catalog-')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self._snapshot = self._mtime = None
+
+
+def _make_backend():
+    if os.environ.get('CATALOG_CACHE_BACKEND', 'memory') == 'file':
+        return FileBackend(os.environ.get('CATALOG_CACHE_PATH', '.data/cache/catalog.pickle'))
+    return MemoryBackend()
+
+
+backend = _make_backend()
+_rebuild_lock = threading.Lock()
+# Naik setiap invalidasi; snapshot yang dibangun sebelum invalidasi tidak disimpan
+_generation = 0
+
+
+def _is_fresh(snapshot):
+    return snapshot is not None and time.time() - snapshot['built_at'] < CATALOG_CACHE_TTL
+
+
+def build_snapshot(db, from_secondary=False):
+    """Ambil seluruh katalog dari database (produk terbaru lebih dulu)."""
+    collection = reporting(db.products) if from_secondary else db.products
+    products = list(collection.find().sort('_id', -1))
+    digest = hashlib.sha1()
+    for product in products:
+        digest.update(bson.encode(product))
+    return {
+        'version': digest.hexdigest()[:16],
+        'products': products,
+        # Peta ukuran -> harga per produk, dipakai /api/quote tanpa query ke database
+        'prices': {str(product['_id']): price_map(product) for product in products},
+        'built_at': time.time(),
+    }
+
+
+def get_snapshot(db):
+    """Snapshot katalog saat ini; dibangun ulang hanya jika kosong/kadaluarsa."""
+    snapshot = backend.load()
+    if _is_fresh(snapshot):
+        return snapshot
+    with _rebuild_lock:
+        snapshot = backend.load()
+        if not _is_fresh(snapshot):
+            generation = _generation
+            # Setelah invalidasi (snapshot kosong) baca dari primary supaya perubahan
+            # admin langsung terlihat; penyegaran karena TTL boleh dari secondary
+            snapshot = build_snapshot(db, from_secondary=snapshot is not None)
+            if generation == _generation:
+                backend.store(snapshot)
+    return snapshot
+
+
+def catalog_version(db):
+    return get_snapshot(db)['version']
+
+
+def all_products(db):
+    """Semua produk. Dokumen dipakai bersama, jangan diubah."""
+    return get_snapshot(db)['products']
+
+
+def price_maps(db):
+    """{produk_id (str): pricing.price_map(produk)} untuk seluruh katalog."""
+    return get_snapshot(db)['prices']
+
+
+def latest_products(db, limit):
+    return get_snapshot(db)['products'][:limit]
+
+
+def invalidate_catalog():
+    """Panggil setelah produk ditambah, diubah, atau dihapus."""
+    global _generation
+    _generation += 1
+    backend.clear()
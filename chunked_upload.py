@@ -0,0 +1,205 @@
+"""Upload bertahap (chunked) yang bisa dilanjutkan untuk file desain besar.
+
+Alur: init -> PUT potongan file dengan offset -> finalize (cek checksum) ->
+file dipasang ke pesanan sebagai `desain` saat form pemesanan dikirim.
+
+Status upload disimpan di disk lokal (CHUNKED_UPLOAD_DIR/<upload_id>/):
+`data.part` berisi byte yang sudah diterima (ukurannya = offset saat ini),
+`meta.json` berisi nama file, ukuran total, pemilik, dan status.
+"""
+import hashlib
+import json
+import os
+import re
+import secrets
+import shutil
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows (development)
+    fcntl = None
+
+from storage import store_file
+from uploads import MB, EXTENSION_TYPES, UPLOAD_KINDS, sniff_type
+
+CHUNKED_UPLOAD_DIR = os.environ.get('CHUNKED_UPLOAD_DIR', './.data/chunked_uploads')
+CHUNK_SIZE = 8 * MB  # Ukuran potongan yang disarankan ke client
+MAX_CHUNK_SIZE = 16 * MB
+MAX_UPLOAD_SIZE = int(os.environ.get('CHUNKED_UPLOAD_MAX_MB', 2048)) * MB
+# File desain di atas ukuran ini dikirim lewat upload bertahap oleh form pemesanan
+CHUNKED_THRESHOLD = int(os.environ.get('CHUNKED_THRESHOLD_MB', 20)) * MB
+READ_SIZE = 64 * 1024
+
+_UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class ChunkedUploadError(Exception):
+    """Kesalahan upload bertahap beserta status HTTP-nya."""
+
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+def _upload_dir(upload_id):
+    if not _UPLOAD_ID.match(upload_id or ''):
+        raise ChunkedUploadError('Upload tidak ditemukan.', 404)
+    return os.path.join(CHUNKED_UPLOAD_DIR, upload_id)
+
+
+def _write_meta(upload_id, meta):
+    directory = _upload_dir(upload_id)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.meta-')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(directory, 'meta.json'))
+
+
+def _read_meta(upload_id, user_id):
+    directory = _upload_dir(upload_id)
+    try:
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+    except (FileNotFoundError, ValueError):
+        raise ChunkedUploadError('Upload tidak ditemukan.', 404)
+    if meta['user_id'] != str(user_id):
+        raise ChunkedUploadError('Upload tidak ditemukan.', 404)
+    try:
+        meta['offset'] = os.path.getsize(os.path.join(directory, 'data.part'))
+    except FileNotFoundError:
+        # Sudah dipasang ke pesanan oleh kiriman form lain (attach_upload) di antara baca dan cek
+        raise ChunkedUploadError('Upload tidak ditemukan.', 404)
+    return meta
+
+
+def _public(meta):
+    return {
+        'upload_id': meta['upload_id'],
+        'filename': meta['filename'],
+        'size': meta['size'],
+        'offset': meta['offset'],
+        'complete': meta['complete'],
+        'chunk_size': CHUNK_SIZE,
+    }
+
+
+def init_upload(user_id, filename, size):
+    """Mulai upload baru untuk file `filename` berukuran `size` byte."""
+    ext = filename.rsplit('.', 1)[1].lower() if '.' in (filename or '') else ''
+    if EXTENSION_TYPES.get(ext) not in UPLOAD_KINDS['desain']:
+        raise ChunkedUploadError('Ekstensi file tidak diizinkan.')
+    if not isinstance(size, int) or size <= 0:
+        raise ChunkedUploadError('Ukuran file tidak valid.')
+    if size > MAX_UPLOAD_SIZE:
+        raise ChunkedUploadError('Ukuran file terlalu besar.', 413)
+
+    upload_id = secrets.token_hex(16)
+    os.makedirs(_upload_dir(upload_id))
+    open(os.path.join(_upload_dir(upload_id), 'data.part'), 'wb').close()
+    meta = {
+        'upload_id': upload_id,
+        'user_id': str(user_id),
+        'filename': filename,
+        'size': size,
+        'complete': False,
+        'sha256': None,
+        'created': time.time(),
+    }
+    _write_meta(upload_id, meta)
+    meta['offset'] = 0
+    return _public(meta)
+
+
+def get_upload(upload_id, user_id):
+    return _public(_read_meta(upload_id, user_id))
+
+
+def write_chunk(upload_id, user_id, offset, stream, chunk_sha256=None):
+    """Tulis satu potongan mulai dari `offset` (harus sama dengan offset saat ini).
+
+    Jika checksum potongan tidak cocok, potongan dibuang dan client mengirim ulang.
+    """
+    meta = _read_meta(upload_id, user_id)
+    if meta['complete']:
+        raise ChunkedUploadError('Upload sudah selesai.', 409, offset=meta['offset'])
+
+    path = os.path.join(_upload_dir(upload_id), 'data.part')
+    with open(path, 'r+b') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        current = os.fstat(f.fileno()).st_size
+        if offset != current:
+            raise ChunkedUploadError('Offset tidak sesuai.', 409, offset=current)
+
+        f.seek(offset)
+        digest = hashlib.sha256()
+        written = 0
+        while True:
+            data = stream.read(READ_SIZE)
+            if not data:
+                break
+            written += len(data)
+            if written > MAX_CHUNK_SIZE or offset + written > meta['size']:
+                f.truncate(offset)
+                raise ChunkedUploadError('Potongan file terlalu besar.', 413, offset=offset)
+            digest.update(data)
+            f.write(data)
+
+        if chunk_sha256 and digest.hexdigest() != chunk_sha256.lower():
+            f.truncate(offset)
+            raise ChunkedUploadError('Checksum potongan tidak cocok.', 422, offset=offset)
+        f.flush()
+        os.fsync(f.fileno())
+        meta['offset'] = offset + written
+    return _public(meta)
+
+
+def finalize_upload(upload_id, user_id, sha256):
+    """Tandai upload selesai setelah ukuran, checksum seluruh file, dan jenis file dicek."""
+    meta = _read_meta(upload_id, user_id)
+    if meta['complete']:
+        return _public(meta)
+    if not isinstance(sha256, str) or not re.match(r'^[0-9a-fA-F]{64}$', sha256):
+        raise ChunkedUploadError('Checksum SHA-256 file wajib dikirim.')
+    if meta['offset'] != meta['size']:
+        raise ChunkedUploadError('Upload belum lengkap.', 409, offset=meta['offset'])
+
+    path = os.path.join(_upload_dir(upload_id), 'data.part')
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        file_type = sniff_type(f)
+        for data in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(data)
+    if digest.hexdigest() != sha256.lower():
+        raise ChunkedUploadError('Checksum file tidak cocok.', 422)
+
+    ext = meta['filename'].rsplit('.', 1)[1].lower()
+    if file_type != EXTENSION_TYPES[ext]:
+        raise ChunkedUploadError('Isi file tidak sesuai dengan ekstensinya.')
+
+    meta['complete'] = True
+    meta['sha256'] = digest.hexdigest()
+    _write_meta(upload_id, {k: v for k, v in meta.items() if k != 'offset'})
+    return _public(meta)
+
+
+def attach_upload(db, upload_id, user_id):
+    """Pindahkan upload yang sudah selesai ke storage area `desain` lalu hapus statusnya.
+
+    Mengembalikan (key storage, nama file asli).
+    """
+    meta = _read_meta(upload_id, user_id)
+    if not meta['complete']:
+        raise ChunkedUploadError('Upload belum selesai.', 409)
+    directory = _upload_dir(upload_id)
+    ext = meta['filename'].rsplit('.', 1)[1].lower()
+    try:
+        key = store_file(db, os.path.join(directory, 'data.part'), 'desain', EXTENSION_TYPES[ext], meta['sha256'])
+    except FileNotFoundError:
+        # Kiriman form ganda: upload yang sama sudah dipindahkan oleh request lain
+        raise ChunkedUploadError('Upload tidak ditemukan.', 404)
+    shutil.rmtree(directory, ignore_errors=True)
+    return key, meta['filename']
@@ -0,0 +1,126 @@
+"""Penghitung dashboard admin yang disimpan (bukan dihitung ulang tiap request).
+
+Satu dokumen `counters` dengan `_id: 'totals'`:
+
+    {'users': 12, 'products': 4, 'orders': 30,
+     'status': {'Konfirmasi': 5, 'Diproses': 3, ...}}
+
+Route yang menambah/menghapus pengguna, produk, atau pesanan dan yang
+mengubah status pesanan memanggil fungsi di sini (`$inc` atomic). Karena
+tulis data dan tulis penghitung bukan satu transaksi, `reconcile` menghitung
+ulang semuanya secara berkala:
+
+    python counters.py              # sekali
+    python counters.py --loop 3600  # tiap 1 jam
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+from os.path import join, dirname
+
+from dotenv import load_dotenv
+
+from database import get_db
+from orders import ORDER_STATUSES
+
+TOTALS_ID = 'totals'
+
+
+def _inc(db, fields):
+    db.counters.update_one({'_id': TOTALS_ID}, {'$inc': fields}, upsert=True)
+
+
+def count_user(db, delta=1):
+    _inc(db, {'users': delta})
+
+
+def count_product(db, delta=1):
+    _inc(db, {'products': delta})
+
+
+def count_order(db, status, delta=1):
+    fields = {'orders': delta}
+    if status:
+        fields[f'status.{status}'] = delta
+    _inc(db, fields)
+
+
+def move_order_status(db, old_status, new_status):
+    """Pindahkan satu pesanan dari hitungan `old_status` ke `new_status`."""
+    move_order_statuses(db, [(old_status, new_status)])
+
+
+def move_order_statuses(db, moves):
+    """Seperti move_order_status untuk banyak pesanan sekaligus (satu `$inc`)."""
+    fields = {}
+    for old_status, new_status in moves:
+        if old_status == new_status:
+            continue
+        fields[f'status.{new_status}'] = fields.get(f'status.{new_status}', 0) + 1
+        if old_status:
+            fields[f'status.{old_status}'] = fields.get(f'status.{old_status}', 0) - 1
+    fields = {field: delta for field, delta in fields.items() if delta}
+    if fields:
+        _inc(db, fields)
+
+
+def uncount_orders(db, statuses):
+    """Kurangi penghitung untuk pesanan yang dihapus (status tiap pesanan)."""
+    if not statuses:
+        return
+    fields = {'orders': -len(statuses)}
+    for status in statuses:
+        if status:
+            fields[f'status.{status}'] = fields.get(f'status.{status}', 0) - 1
+    _inc(db, fields)
+
+
+def reconcile(db):
+    """Hitung ulang semua penghitung dari data sebenarnya dan simpan."""
+    status = {name: 0 for name in ORDER_STATUSES}
+    for row in db.orders.aggregate([{'$group': {'_id': '$status', 'count': {'$sum': 1}}}]):
+        # Status di luar daftar (data lama) tetap dihitung supaya totalnya cocok
+        if row['_id']:
+            status[str(row['_id'])] = row['count']
+    totals = {
+        'users': db.users.count_documents({}),
+        'products': db.products.count_documents({}),
+        'orders': db.orders.count_documents({}),
+        'status': status,
+        'reconciled_at': datetime.now(),
+    }
+    db.counters.replace_one({'_id': TOTALS_ID}, totals, upsert=True)
+    return totals
+
+
+def read_totals(db):
+    """Penghitung saat ini; dihitung ulang sekali jika belum pernah dibuat."""
+    totals = db.counters.find_one({'_id': TOTALS_ID})
+    if not totals or 'reconciled_at' not in totals:
+        totals = reconcile(db)
+    status = {name: 0 for name in ORDER_STATUSES}
+    status.update(totals.get('status', {}))
+    return {
+        'total_customers': totals.get('users', 0),
+        'total_products': totals.get('products', 0),
+        'total_orders': totals.get('orders', 0),
+        'orders_by_status': status,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Hitung ulang penghitung dashboard admin.')
+    parser.add_argument('--loop', type=float, default=0, help='ulangi setiap N detik')
+    args = parser.parse_args()
+
+    load_dotenv(join(dirname(__file__), '.env'))
+    db = get_db()
+
+    while True:
+        totals = reconcile(db)
+        print(f"{datetime.now():%Y-%m-%d %H:%M:%S} users={totals['users']} products={totals['products']} "
+              f"orders={totals['orders']} status={totals['status']}")
+        if not args.loop:
+            sys.exit(0)
+        time.sleep(args.loop)
@@ -0,0 +1,197 @@
+"""Koneksi MongoDB yang dibuat saat pertama dipakai, satu client per proses.
+
+MongoClient tidak aman dibawa melewati `fork()` (thread monitor dan socket
+ikut tersalin), jadi client tidak dibuat saat import. Dengan server prefork
+(gunicorn), setiap worker membuat client sendiri setelah fork; `reset_client`
+dipanggil dari hook `post_fork` di gunicorn.conf.py.
+
+`db` adalah proxy ke database sehingga kode lain tetap bisa menulis
+`db.orders.find(...)` atau `db['users']`.
+
+Pengaturan client dari env (kosong = default driver):
+
+    MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS, MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_CONNECT_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS,
+    MONGO_COMPRESSORS (misal `zstd,snappy,zlib`), MONGO_READ_PREFERENCE
+
+Query laporan/admin yang boleh sedikit tertinggal dibaca lewat `reporting()`
+dengan MONGO_REPORTING_READ_PREFERENCE (default `secondaryPreferred`) dan
+MONGO_MAX_STALENESS_S. Statistik pool koneksi (CMAP) ada di `pool_stats`.
+"""
+import os
+import threading
+
+from pymongo import MongoClient, monitoring
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+from werkzeug.local import LocalProxy
+
+# Opsi MongoClient -> (env, tipe)
+CLIENT_OPTIONS = {
+    'maxPoolSize': ('MONGO_MAX_POOL_SIZE', int),
+    'minPoolSize': ('MONGO_MIN_POOL_SIZE', int),
+    'maxIdleTimeMS': ('MONGO_MAX_IDLE_TIME_MS', int),
+    'waitQueueTimeoutMS': ('MONGO_WAIT_QUEUE_TIMEOUT_MS', int),
+    'serverSelectionTimeoutMS': ('MONGO_SERVER_SELECTION_TIMEOUT_MS', int),
+    'connectTimeoutMS': ('MONGO_CONNECT_TIMEOUT_MS', int),
+    'socketTimeoutMS': ('MONGO_SOCKET_TIMEOUT_MS', int),
+    'compressors': ('MONGO_COMPRESSORS', str),
+    'zlibCompressionLevel': ('MONGO_ZLIB_COMPRESSION_LEVEL', int),
+    'readPreference': ('MONGO_READ_PREFERENCE', str),
+    'appname': ('MONGO_APPNAME', str),
+}
+
+READ_PREFERENCES = {
+    'primary': Primary,
+    'primaryPreferred': PrimaryPreferred,
+    'secondary': Secondary,
+    'secondaryPreferred': SecondaryPreferred,
+    'nearest': Nearest,
+}
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Menghitung koneksi yang sedang dipakai dan lama menunggu checkout (per proses)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.open = 0
+            self.in_use = 0
+            self.max_in_use = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.clears = 0
+
+    def _wait(self, event):
+        duration = getattr(event, 'duration', None) or 0.0
+        self.wait_total += duration
+        self.wait_max = max(self.wait_max, duration)
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            self._wait(event)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+            self._wait(event)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.clears += 1
+
+    # Event lain tidak dihitung
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'open': self.open,
+                'in_use': self.in_use,
+                'max_in_use': self.max_in_use,
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'wait_ms_avg': round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'wait_ms_max': round(self.wait_max * 1000, 3),
+                'pool_cleared': self.clears,
+            }
+
+
+pool_stats = PoolStats()
+
+_client = None
+_client_pid = None
+_lock = threading.Lock()
+
+
+def client_options():
+    """Opsi MongoClient yang diatur lewat env."""
+    options = {}
+    for option, (env, cast) in CLIENT_OPTIONS.items():
+        value = os.environ.get(env)
+        if value:
+            options[option] = cast(value)
+    return options
+
+
+def reporting_read_preference():
+    name = os.environ.get('MONGO_REPORTING_READ_PREFERENCE', 'secondaryPreferred')
+    if name not in READ_PREFERENCES:
+        raise ValueError(f'Read preference tidak dikenal: {name}')
+    if name == 'primary':
+        return Primary()
+    return READ_PREFERENCES[name](max_staleness=int(os.environ.get('MONGO_MAX_STALENESS_S', -1)))
+
+
+def reporting(collection):
+    """`collection` dengan read preference laporan (boleh dibaca dari secondary)."""
+    return collection.with_options(read_preference=reporting_read_preference())
+
+
+def get_client():
+    """MongoClient milik proses ini (dibuat ulang jika proses hasil fork)."""
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _lock:
+            if _client is None or _client_pid != os.getpid():
+                pool_stats.reset()
+                _client = MongoClient(os.environ.get("MONGODB_URI"), event_listeners=[pool_stats],
+                                      **client_options())
+                _client_pid = os.getpid()
+    return _client
+
+
+def get_db():
+    return get_client()[os.environ.get("DB_NAME")]
+
+
+def reset_client():
+    """Lupakan client warisan proses induk; client baru dibuat saat dipakai."""
+    global _client, _client_pid
+    _client = _client_pid = None
+
+
+def close_client():
+    """Tutup client proses ini (misalnya di proses master sebelum fork)."""
+    global _client, _client_pid
+    if _client is not None and _client_pid == os.getpid():
+        _client.close()
+    _client = _client_pid = None
+
+
+db = LocalProxy(get_db)
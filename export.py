@@ -0,0 +1,109 @@
+"""Ekspor pesanan dan pelanggan ke CSV / NDJSON secara streaming.
+
+Data dibaca dari cursor Mongo per batch dan langsung ditulis ke response
+(generator), jadi pemakaian memori tetap kecil berapa pun jumlah datanya.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from bson import ObjectId
+
+from database import reporting
+from orders import attach_users
+
+BATCH_SIZE = 1000
+FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+# Kolom ekspor: (nama kolom, field dokumen)
+ORDER_COLUMNS = [
+    ('id', '_id'),
+    ('tanggal_pemesanan', 'tanggal_pemesanan'),
+    ('pelanggan', 'user_name'),
+    ('user_id', 'user_id'),
+    ('produk', 'nama_produk'),
+    ('ukuran', 'ukuran'),
+    ('jumlah', 'jumlah'),
+    ('harga_per_satuan', 'harga_per_satuan'),
+    ('total_biaya', 'total_biaya'),
+    ('status', 'status'),
+    ('metode_pembayaran', 'metode_pembayaran'),
+    ('opsi_pengiriman', 'opsi_pengiriman'),
+    ('alamat', 'alamat'),
+]
+
+CUSTOMER_COLUMNS = [
+    ('id', '_id'),
+    ('nama', 'name'),
+    ('email', 'email'),
+    ('telepon', 'phone'),
+]
+
+
+class ExportError(ValueError):
+    """Parameter ekspor tidak valid."""
+
+
+def _value(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='seconds')
+    return value
+
+
+def _csv_cell(value):
+    value = '' if value is None else str(_value(value))
+    # Cegah formula injection saat file dibuka di spreadsheet
+    if value[:1] in ('=', '+', '-', '@') and not value.lstrip('-').replace('.', '', 1).isdigit():
+        value = "'" + value
+    return value
+
+
+def _batches(cursor, size):
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _stream(batches, columns, fmt):
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([name for name, _ in columns])
+        for batch in batches:
+            for doc in batch:
+                writer.writerow([_csv_cell(doc.get(field)) for _, field in columns])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        for batch in batches:
+            yield ''.join(
+                json.dumps({name: _value(doc.get(field)) for name, field in columns}, ensure_ascii=False) + '\n'
+                for doc in batch
+            )
+
+
+def export_orders(db, fmt, query):
+    """Generator isi file ekspor pesanan (terbaru lebih dulu)."""
+    projection = {field: 1 for _, field in ORDER_COLUMNS if field != 'user_name'}
+    cursor = (reporting(db.orders).find(query, projection)
+              .sort([('tanggal_pemesanan', -1), ('_id', -1)])
+              .batch_size(BATCH_SIZE))
+    # Nama pelanggan diambil per batch dengan satu query $in
+    batches = (attach_users(db, batch) for batch in _batches(cursor, BATCH_SIZE))
+    return _stream(batches, ORDER_COLUMNS, fmt)
+
+
+def export_customers(db, fmt):
+    projection = {field: 1 for _, field in CUSTOMER_COLUMNS}
+    cursor = reporting(db.users).find({}, projection).sort('_id', 1).batch_size(BATCH_SIZE)
+    return _stream(_batches(cursor, BATCH_SIZE), CUSTOMER_COLUMNS, fmt)
@@ -0,0 +1,258 @@
+"""Pembersih file upload yang sudah tidak dipakai (orphan).
+
+File di folder upload yang tidak direferensikan oleh dokumen mana pun
+(produk, pengguna, pesanan, keranjang) dan lebih tua dari masa tenggang akan
+dilaporkan, atau dihapus jika memakai --delete.
+
+    python gc_files.py                      # dry-run: hanya laporan
+    python gc_files.py --delete             # hapus file orphan
+    python gc_files.py --delete --grace-hours 48 --batch 200 --sleep 0.5
+    python gc_files.py --delete --loop 3600 # jalan terus tiap 1 jam
+"""
+import argparse
+import hashlib
+import os
+import posixpath
+import shutil
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from os.path import join, dirname
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+from images import IMAGE_EXTENSIONS, original_of
+
+STATIC_DIR = './static'
+
+# Folder upload (relatif terhadap static/) yang diperiksa
+UPLOAD_ROOTS = ['uploads', 'bukti_pembayaran', 'assets/imgProduk', 'profil_user']
+
+# File bawaan yang selalu dianggap dipakai
+ALWAYS_KEEP = {'profil_user/default.png'}
+
+# Area storage.py untuk tiap folder, dipakai untuk mengecek refcount di koleksi `blobs`
+ROOT_AREAS = {'uploads': 'desain', 'bukti_pembayaran': 'bukti', 'assets/imgProduk': 'produk', 'profil_user': 'profil'}
+
+# Tanda `deleting` pada blob yang lebih tua dari ini (GC mati di tengah jalan) boleh diambil alih
+DELETING_TIMEOUT = 3600
+
+# Sisa upload bertahap dan file sementara upload
+TEMP_DIRS = ['./.data/upload_tmp', './.data/chunked_uploads']
+
+
+def _fingerprint(path):
+    """Hash 8 byte dari path supaya set referensi tetap kecil di memori."""
+    return hashlib.blake2b(posixpath.normpath(path).encode(), digest_size=8).digest()
+
+
+def _field_values(doc, field):
+    """Nilai `field` (boleh bertitik melewati array, misalnya `items.desain`) yang terisi."""
+    values = [doc]
+    for part in field.split('.'):
+        found = []
+        for value in values:
+            for item in (value if isinstance(value, list) else [value]):
+                if isinstance(item, dict) and item.get(part) is not None:
+                    found.append(item[part])
+        values = found
+    return [value for value in values if value]
+
+
+def collect_references(db, batch_size=1000):
+    """Kumpulkan semua path file (relatif terhadap static/) yang masih dipakai."""
+    refs = {_fingerprint(path) for path in ALWAYS_KEEP}
+    sources = [
+        ('products', 'photo', 'assets/imgProduk/'),
+        ('users', 'photo', ''),
+        ('orders', 'desain', 'uploads/'),
+        ('orders', 'items.desain', 'uploads/'),
+        ('orders', 'bukti_pembayaran', 'bukti_pembayaran/'),
+        ('carts', 'items.desain', 'uploads/'),
+    ]
+    for collection, field, prefix in sources:
+        cursor = db[collection].find({field: {'$nin': [None, '']}}, {field: 1, '_id': 0}).batch_size(batch_size)
+        for doc in cursor:
+            for value in _field_values(doc, field):
+                refs.add(_fingerprint(prefix + value))
+    return refs
+
+
+def _walk_files(root):
+    """Semua file di bawah root (rekursif) sebagai (path lengkap, DirEntry)."""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def find_orphans(db, refs, grace_seconds, batch_size=500, sleep=0.0):
+    """Hasilkan (folder, key, ukuran) file upload yang tidak dipakai dan lewat masa tenggang.
+
+    `key` adalah path file relatif terhadap folder upload-nya.
+    """
+    cutoff = time.time() - grace_seconds
+    for root in UPLOAD_ROOTS:
+        root_dir = join(STATIC_DIR, root)
+        for batch in _batches(_walk_files(root_dir), batch_size):
+            candidates = {}
+            for entry in batch:
+                key = os.path.relpath(entry.path, root_dir).replace(os.sep, '/')
+                stat = entry.stat(follow_symlinks=False)
+                if stat.st_mtime >= cutoff:
+                    continue
+                stem = original_of(key)
+                if stem is not None:
+                    # Turunan gambar (images.py) ikut dipakai selama file aslinya masih ada
+                    if not any(os.path.exists(join(root_dir, stem + ext)) for ext in IMAGE_EXTENSIONS):
+                        candidates[key] = stat.st_size
+                elif _fingerprint(f'{root}/{key}') not in refs:
+                    candidates[key] = stat.st_size
+
+            # Blob dari storage.py yang refs-nya masih > 0 sedang dipakai (misalnya pesanan baru)
+            if candidates:
+                area = ROOT_AREAS[root]
+                in_use = db.blobs.find({'_id': {'$in': [f'{area}/{key}' for key in candidates]}, 'refs': {'$gt': 0}},
+                                       {'key': 1})
+                for doc in in_use:
+                    candidates.pop(doc['key'], None)
+
+            for key, size in candidates.items():
+                yield root, key, size
+            if sleep:
+                time.sleep(sleep)
+
+
+def _last_modified(entry):
+    """mtime terbaru entry; untuk folder (upload bertahap) juga file di dalamnya.
+
+    Menulis potongan ke `data.part` tidak mengubah mtime foldernya.
+    """
+    mtime = entry.stat(follow_symlinks=False).st_mtime
+    if entry.is_dir(follow_symlinks=False):
+        for root, _, files in os.walk(entry.path):
+            for name in files:
+                try:
+                    mtime = max(mtime, os.stat(os.path.join(root, name)).st_mtime)
+                except FileNotFoundError:
+                    continue
+    return mtime
+
+
+def clean_temp_dirs(grace_seconds, delete):
+    """Hapus sisa file sementara upload dan upload bertahap yang terbengkalai."""
+    cutoff = time.time() - grace_seconds
+    removed = []
+    for temp_dir in TEMP_DIRS:
+        try:
+            entries = list(os.scandir(temp_dir))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if _last_modified(entry) >= cutoff:
+                continue
+            removed.append(entry.path)
+            if delete:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    os.remove(entry.path)
+    return removed
+
+
+def _delete_blob(db, root, key):
+    """Hapus satu file orphan. Kembalikan False jika ternyata dipakai lagi.
+
+    Blob ditandai `deleting` (update bersyarat refs <= 0), file dipindah ke nama
+    sementara, lalu dokumen blob dihapus dengan syarat tanda yang sama. Jika
+    store_upload menambah refs di tengah jalan (storage._add_ref menghapus tandanya),
+    file dikembalikan; isinya sama karena nama file adalah hash isinya. File lama
+    tanpa dokumen blob langsung dihapus.
+    """
+    blob_id = f'{ROOT_AREAS[root]}/{key}'
+    token = uuid.uuid4().hex
+    now = datetime.now()
+    claimed = db.blobs.update_one(
+        {'_id': blob_id, 'refs': {'$lte': 0},
+         # Tanda dari GC yang mati di tengah jalan dianggap basi
+         '$or': [{'deleting': {'$exists': False}}, {'deleting_at': {'$lt': now - timedelta(seconds=DELETING_TIMEOUT)}}]},
+        {'$set': {'deleting': token, 'deleting_at': now}}
+    ).matched_count
+    if not claimed and db.blobs.count_documents({'_id': blob_id}, limit=1):
+        return False
+
+    path = join(STATIC_DIR, root, key)
+    moved = join(dirname(path), f'.gc-{os.path.basename(path)}')
+    try:
+        os.replace(path, moved)
+    except FileNotFoundError:
+        moved = None
+    if claimed and not db.blobs.delete_one({'_id': blob_id, 'refs': {'$lte': 0}, 'deleting': token}).deleted_count:
+        if moved:
+            os.replace(moved, path)
+        db.blobs.update_one({'_id': blob_id, 'deleting': token}, {'$unset': {'deleting': '', 'deleting_at': ''}})
+        return False
+    if moved:
+        os.remove(moved)
+    return True
+
+
+def run_gc(db, delete=False, grace_seconds=24 * 3600, batch_size=500, sleep=0.0, log=print):
+    """Jalankan satu putaran GC. Mengembalikan (jumlah file, total byte)."""
+    refs = collect_references(db)
+    log(f"{len(refs)} file direferensikan")
+
+    count = total = 0
+    for root, key, size in find_orphans(db, refs, grace_seconds, batch_size, sleep):
+        if delete and not _delete_blob(db, root, key):
+            log(f"dilewati (dipakai lagi): {root}/{key}")
+            continue
+        count += 1
+        total += size
+        log(f"{'hapus' if delete else 'orphan'}: {root}/{key} ({size} byte)")
+
+    for path in clean_temp_dirs(grace_seconds, delete):
+        log(f"{'hapus' if delete else 'sementara'}: {path}")
+
+    log(f"{count} file orphan, {total / (1024 * 1024):.1f} MB{'' if delete else ' (dry-run)'}")
+    return count, total
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bersihkan file upload yang tidak dipakai.')
+    parser.add_argument('--delete', action='store_true', help='hapus file (default: dry-run)')
+    parser.add_argument('--grace-hours', type=float, default=24, help='abaikan file yang lebih baru dari ini')
+    parser.add_argument('--batch', type=int, default=500, help='jumlah file per batch')
+    parser.add_argument('--sleep', type=float, default=0.0, help='jeda antar batch (detik) untuk membatasi I/O')
+    parser.add_argument('--loop', type=float, default=0, help='ulangi setiap N detik')
+    args = parser.parse_args()
+
+    load_dotenv(join(dirname(__file__), '.env'))
+    db = MongoClient(os.environ.get("MONGODB_URI"))[os.environ.get("DB_NAME")]
+
+    while True:
+        run_gc(db, args.delete, args.grace_hours * 3600, args.batch, args.sleep)
+        if not args.loop:
+            sys.exit(0)
+        time.sleep(args.loop)
@@ -0,0 +1,63 @@
+"""Konfigurasi gunicorn (server prefork) untuk wsgi:app.
+
+Semua nilai bisa diatur lewat env. Reload tanpa downtime (kode baru, worker
+lama menyelesaikan request yang sedang berjalan):
+
+    kill -HUP $(cat .data/gunicorn.pid)
+
+Tambah/kurangi worker saat berjalan: `kill -TTIN` / `kill -TTOU` ke PID yang sama.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:' + os.environ.get('PORT', '5000'))
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('WEB_THREADS', 4))
+worker_class = 'gthread'
+
+# Upload desain besar bisa lama; request yang macet tetap dihentikan
+timeout = int(os.environ.get('WEB_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+# Worker diganti berkala untuk membatasi kebocoran memori
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+
+# preload_app=False supaya HUP memuat ulang kode aplikasi
+preload_app = False
+pidfile = os.environ.get('GUNICORN_PIDFILE', '.data/gunicorn.pid')
+accesslog = '-'
+errorlog = '-'
+forwarded_allow_ips = os.environ.get('FORWARDED_ALLOW_IPS', '127.0.0.1')
+
+
+def on_starting(server):
+    """Sekali di proses master: secret key, manifest aset statis, dan index Mongo."""
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
+
+    import database
+    from indexes import ensure_indexes
+    from pymongo.errors import PyMongoError
+    from secret_key import load_secret_key
+    from static_assets import load_manifest
+
+    load_secret_key()
+    load_manifest()
+    try:
+        ensure_indexes(database.get_db())
+    except PyMongoError as e:
+        server.log.warning('ensure_indexes gagal: %s', e)
+    except RuntimeError as e:
+        # Index tidak bisa dibuat (misalnya data lama melanggar unique); aplikasi tetap jalan,
+        # perbaiki datanya lalu jalankan `python indexes.py`
+        server.log.error('%s', e)
+    finally:
+        # Client master tidak boleh terbawa ke worker
+        database.close_client()
+
+
+def post_fork(server, worker):
+    import database
+    database.reset_client()
@@ -0,0 +1,48 @@
+"""Kunci idempotensi formulir pemesanan (cegah pesanan ganda saat tombol diklik dua kali).
+
+Setiap kali halaman pemesanan dirender, formulirnya membawa token bertanda
+tangan (hidden input `idempotency_key`) berisi kunci acak dan waktu dibuat.
+Kunci disimpan di dokumen pesanan dengan unique index
+`(user_id, idempotency_key)`, sehingga kiriman ulang formulir yang sama
+mengarah ke pesanan pertama tanpa menyimpan file desain lagi. Token lebih tua
+dari IDEMPOTENCY_WINDOW_S (default 1 hari) ditolak; pengguna diminta mengisi
+ulang formulir.
+"""
+import os
+import uuid
+
+from flask import current_app
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+WINDOW = int(os.environ.get('IDEMPOTENCY_WINDOW_S', 24 * 3600))
+FIELD = 'idempotency_key'
+
+
+class IdempotencyError(ValueError):
+    """Token formulir tidak valid atau kedaluwarsa; pesan siap ditampilkan."""
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.secret_key, salt='pemesanan')
+
+
+def new_token():
+    """Token baru untuk hidden input formulir pemesanan."""
+    return _serializer().dumps(uuid.uuid4().hex)
+
+
+def read_token(token):
+    """Kunci idempotensi dari token formulir."""
+    if not token:
+        raise IdempotencyError('Formulir tidak lengkap, silakan ulangi pemesanan.')
+    try:
+        return _serializer().loads(token, max_age=WINDOW)
+    except SignatureExpired:
+        raise IdempotencyError('Formulir sudah kedaluwarsa, silakan ulangi pemesanan.')
+    except BadSignature:
+        raise IdempotencyError('Formulir tidak valid, silakan ulangi pemesanan.')
+
+
+def find_order(db, user_id, key):
+    """Pesanan yang sudah dibuat dengan kunci ini (atau None)."""
+    return db.orders.find_one({'user_id': user_id, FIELD: key}, {'_id': 1})
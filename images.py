@@ -0,0 +1,196 @@
+"""Turunan gambar (thumbnail dan WebP) untuk foto produk, foto profil, dan banner.
+
+Untuk setiap gambar asli dibuat beberapa ukuran (VARIANTS) dalam format WebP
+dan JPEG, disimpan di samping file aslinya:
+
+    assets/imgProduk/ab/cd/abcd...ef.png
+    assets/imgProduk/ab/cd/abcd...ef.card.webp
+    assets/imgProduk/ab/cd/abcd...ef.card.jpg
+
+Template memakai `responsive_img(...)` yang menghasilkan `<picture>` dengan
+`srcset`; jika turunan belum ada, file asli yang dipakai.
+
+Pillow bersifat opsional: tanpa Pillow upload tetap jalan, hanya tanpa turunan.
+Gambar yang sudah ada bisa dibuatkan turunannya dengan:
+
+    python images.py            # foto produk, profil, dan banner di static/gambar
+    python images.py --force    # buat ulang semua turunan
+"""
+import argparse
+import functools
+import os
+import re
+import tempfile
+
+from flask import url_for
+from markupsafe import Markup, escape
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow belum terpasang
+    Image = None
+
+STATIC_DIR = './static'
+
+# Nama varian -> lebar maksimum (px)
+VARIANTS = {'thumb': 200, 'card': 600, 'full': 1600}
+FORMATS = ('webp', 'jpg')
+QUALITY = {'webp': 80, 'jpg': 82}
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# Folder (relatif terhadap static/) yang dibuatkan turunan oleh backfill
+BACKFILL_DIRS = ['assets/imgProduk', 'profil_user', 'gambar']
+
+_VARIANT_NAME = re.compile(r'\.(%s)\.(%s)$' % ('|'.join(VARIANTS), '|'.join(FORMATS)))
+
+
+def is_variant(path):
+    return bool(_VARIANT_NAME.search(path))
+
+
+def original_of(path):
+    """Untuk path turunan kembalikan stem file aslinya (tanpa ekstensi), selain itu None."""
+    match = _VARIANT_NAME.search(path)
+    return path[:match.start()] if match else None
+
+
+def variant_path(path, variant, fmt):
+    return f'{os.path.splitext(path)[0]}.{variant}.{fmt}'
+
+
+def _save_atomic(image, dest, fmt):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest), prefix='.part-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            if fmt == 'webp':
+                image.save(out, 'WEBP', quality=QUALITY[fmt], method=4)
+            else:
+                image.save(out, 'JPEG', quality=QUALITY[fmt], optimize=True, progressive=True)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def generate_variants(path, force=False):
+    """Buat semua turunan untuk gambar di `path`; kembalikan daftar file yang dibuat."""
+    if Image is None or not path.lower().endswith(IMAGE_EXTENSIONS) or is_variant(path):
+        return []
+    targets = [(variant, fmt, variant_path(path, variant, fmt)) for variant in VARIANTS for fmt in FORMATS]
+    if not force:
+        targets = [t for t in targets if not os.path.exists(t[2])]
+    if not targets:
+        return []
+
+    created = []
+    with Image.open(path) as source:
+        source = ImageOps.exif_transpose(source)
+        has_alpha = source.mode in ('RGBA', 'LA', 'P')
+        source = source.convert('RGBA' if has_alpha else 'RGB')
+
+        resized = {}
+        for variant, fmt, dest in targets:
+            if variant not in resized:
+                width = min(VARIANTS[variant], source.width)
+                height = max(1, round(source.height * width / source.width))
+                resized[variant] = source.resize((width, height), Image.LANCZOS)
+            image = resized[variant]
+            if fmt == 'jpg' and has_alpha:
+                # JPEG tidak punya transparansi: tempel di atas latar putih
+                flat = Image.new('RGB', image.size, (255, 255, 255))
+                flat.paste(image, mask=image.getchannel('A'))
+                image = flat
+            _save_atomic(image, dest, fmt)
+            created.append(dest)
+    return created
+
+
+@functools.lru_cache(maxsize=4096)
+def _image_width(path, mtime):
+    """Lebar gambar (hanya header yang dibaca); di-cache per (path, mtime)."""
+    with Image.open(path) as image:
+        return image.width
+
+
+def _variant_widths(filename):
+    """{varian: lebar sebenarnya} untuk turunan `filename`, atau None jika turunan belum lengkap.
+
+    Turunan tidak pernah diperbesar, jadi untuk gambar kecil lebarnya bisa lebih kecil
+    dari VARIANTS; varian yang hasilnya sama lebar dengan varian sebelumnya dilewati.
+    """
+    path = os.path.join(STATIC_DIR, filename)
+    if not all(os.path.exists(variant_path(path, variant, fmt)) for variant in VARIANTS for fmt in FORMATS):
+        return None
+    widths = {}
+    for variant, target in VARIANTS.items():
+        if Image is None:
+            width = target
+        else:
+            jpg = variant_path(path, variant, 'jpg')
+            try:
+                width = _image_width(jpg, os.path.getmtime(jpg))
+            except OSError:
+                return None
+        if width not in widths.values():
+            widths[variant] = width
+    return widths
+
+
+def _srcset(filename, fmt, widths):
+    stem = os.path.splitext(filename)[0]
+    return ', '.join(f"{url_for('static', filename=f'{stem}.{variant}.{fmt}')} {width}w"
+                     for variant, width in widths.items())
+
+
+def has_variants(filename):
+    return _variant_widths(filename) is not None
+
+
+def responsive_img(filename, alt='', sizes='100vw', **attrs):
+    """Helper template: `<picture>` dengan srcset WebP + JPEG untuk `filename`
+    (relatif terhadap static/). Atribut lain diteruskan ke `<img>`; pakai
+    `class_` untuk atribut class.
+    """
+    src = url_for('static', filename=filename)
+    extra = ''.join(f' {escape(name.rstrip("_").replace("_", "-"))}="{escape(value)}"'
+                    for name, value in attrs.items())
+    widths = _variant_widths(filename)
+    if not widths:
+        return Markup(f'<img src="{escape(src)}" alt="{escape(alt)}"{extra} />')
+    return Markup(
+        '<picture>'
+        f'<source type="image/webp" srcset="{escape(_srcset(filename, "webp", widths))}" sizes="{escape(sizes)}" />'
+        f'<img src="{escape(src)}" srcset="{escape(_srcset(filename, "jpg", widths))}" sizes="{escape(sizes)}"'
+        f' alt="{escape(alt)}"{extra} />'
+        '</picture>'
+    )
+
+
+def backfill(force=False, log=print):
+    """Buat turunan untuk semua gambar yang sudah ada di BACKFILL_DIRS."""
+    if Image is None:
+        raise SystemExit('Pillow belum terpasang: pip install Pillow')
+    total = 0
+    for directory in BACKFILL_DIRS:
+        for root, _, files in os.walk(os.path.join(STATIC_DIR, directory)):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    created = generate_variants(path, force)
+                except OSError as e:
+                    log(f"gagal: {path} ({e})")
+                    continue
+                if created:
+                    total += len(created)
+                    log(f"{path}: {len(created)} turunan")
+    log(f"{total} file turunan dibuat")
+    return total
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Buat thumbnail dan WebP untuk gambar yang sudah ada.')
+    parser.add_argument('--force', action='store_true', help='buat ulang turunan yang sudah ada')
+    args = parser.parse_args()
+    backfill(args.force)
@@ -0,0 +1,122 @@
+"""Manajemen index MongoDB untuk Aprilion Printing.
+
+Dipakai saat startup (lihat app.py) atau lewat CLI:
+
+    python indexes.py           # buat semua index yang dibutuhkan
+    python indexes.py --check   # buat index lalu cek query plan (explain)
+"""
+import os
+import sys
+from datetime import datetime
+from os.path import join, dirname
+
+from bson import ObjectId
+from dotenv import load_dotenv
+from pymongo import ASCENDING, DESCENDING, MongoClient
+from pymongo.errors import OperationFailure
+
+# Daftar index yang dibutuhkan oleh query di app.py.
+# Format: (nama koleksi, key, opsi tambahan)
+INDEXES = [
+    # login / register
+    ('users', [('email', ASCENDING)], {'name': 'email_unique', 'unique': True}),
+    # admin_login / tambah_data_admin
+    ('admins', [('email', ASCENDING)], {'name': 'email_unique', 'unique': True}),
+    # riwayat_pemesanan: find({'user_id': ...}).sort('_id', -1)
+    ('orders', [('user_id', ASCENDING), ('_id', DESCENDING)], {'name': 'user_id_id'}),
+    # riwayat_pemesanan dengan filter status
+    ('orders', [('user_id', ASCENDING), ('status', ASCENDING), ('_id', DESCENDING)], {'name': 'user_id_status_id'}),
+    # adminDaftarPemesanan: find().sort('tanggal_pemesanan', -1)
+    ('orders', [('tanggal_pemesanan', DESCENDING), ('_id', DESCENDING)], {'name': 'tanggal_pemesanan_id'}),
+    # pemesanan: kiriman ulang formulir yang sama (idempotency.py); pesanan lama tanpa kunci tidak diindex
+    ('orders', [('user_id', ASCENDING), ('idempotency_key', ASCENDING)],
+     {'name': 'user_id_idempotency_key', 'unique': True,
+      'partialFilterExpression': {'idempotency_key': {'$type': 'string'}}}),
+    # daftar pesanan yang difilter berdasarkan status
+    ('orders', [('status', ASCENDING), ('tanggal_pemesanan', DESCENDING)], {'name': 'status_tanggal_pemesanan'}),
+    # laporan admin (rollups.report): find({'period', 'dim', 'bucket' range})
+    ('rollups', [('period', ASCENDING), ('dim', ASCENDING), ('bucket', ASCENDING)], {'name': 'period_dim_bucket'}),
+    # riwayat status satu pesanan (status_events.order_timeline)
+    ('status_events', [('order_id', ASCENDING), ('ts', ASCENDING)], {'name': 'order_id_ts'}),
+    # lama per status dalam rentang waktu (status_events.time_in_status)
+    ('status_events', [('ts', ASCENDING), ('from', ASCENDING)], {'name': 'ts_from'}),
+    # antrean job: job siap dijalankan paling lama menunggu (jobs.claim)
+    ('jobs', [('status', ASCENDING), ('run_at', ASCENDING)], {'name': 'status_run_at'}),
+    # job selesai dihapus otomatis setelah 7 hari
+    ('jobs', [('finished_at', ASCENDING)], {'name': 'finished_at_ttl', 'expireAfterSeconds': 7 * 24 * 3600}),
+    # pesanan yang tertahan di satu status (status_events.stuck_orders)
+    ('orders', [('status', ASCENDING), ('status_since', ASCENDING)], {'name': 'status_status_since'}),
+]
+
+# Bentuk query yang harus memakai index (tidak boleh COLLSCAN).
+# Format: (nama, koleksi, filter, sort)
+QUERY_SHAPES = [
+    ('login', 'users', {'email': 'cek@example.com'}, None),
+    ('admin_login', 'admins', {'email': 'cek@example.com'}, None),
+    ('riwayat_pemesanan', 'orders', {'user_id': ObjectId()}, [('_id', DESCENDING)]),
+    ('riwayat_pemesanan_status', 'orders', {'user_id': ObjectId(), 'status': 'Selesai'}, [('_id', DESCENDING)]),
+    ('adminDaftarPemesanan', 'orders', {}, [('tanggal_pemesanan', DESCENDING)]),
+    ('pesanan_per_status', 'orders', {'status': 'Konfirmasi'}, [('tanggal_pemesanan', DESCENDING)]),
+    ('produk_terbaru', 'products', {}, [('_id', DESCENDING)]),
+    ('laporan', 'rollups', {'period': 'day', 'dim': 'produk', 'bucket': {'$gte': '2024-01-01'}}, None),
+    ('pemesanan_ulang', 'orders', {'user_id': ObjectId(), 'idempotency_key': 'cek'}, None),
+    ('ambil_job', 'jobs', {'status': {'$in': ['queued', 'running']}, 'run_at': {'$lte': datetime(2024, 1, 1)}},
+     [('run_at', ASCENDING)]),
+    ('riwayat_status', 'status_events', {'order_id': ObjectId()}, [('ts', ASCENDING)]),
+    ('lama_status', 'status_events', {'ts': {'$gte': datetime(2024, 1, 1)}}, None),
+    ('pesanan_tertahan', 'orders', {'status': 'Diproses', 'status_since': {'$lt': datetime(2024, 1, 1)}}, None),
+]
+
+
+def ensure_indexes(db):
+    """Buat semua index di INDEXES. Aman dipanggil berulang kali."""
+    created = []
+    for collection, keys, options in INDEXES:
+        try:
+            created.append((collection, db[collection].create_index(keys, **options)))
+        except OperationFailure as e:
+            # Biasanya karena data lama melanggar unique (email ganda)
+            raise RuntimeError(f"Gagal membuat index {options.get('name')} pada {collection}: {e}") from e
+    return created
+
+
+def _plan_stages(plan):
+    """Ambil semua nama stage dari sebuah winningPlan (rekursif)."""
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage']
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+def check_query_plans(db):
+    """Jalankan explain() untuk tiap bentuk query dan kembalikan yang jatuh ke COLLSCAN."""
+    failures = []
+    for name, collection, query, sort in QUERY_SHAPES:
+        cursor = db[collection].find(query).limit(1)
+        if sort:
+            cursor = cursor.sort(sort)
+        winning_plan = cursor.explain().get('queryPlanner', {}).get('winningPlan', {})
+        stages = list(_plan_stages(winning_plan))
+        if 'COLLSCAN' in stages:
+            failures.append((name, collection, stages))
+    return failures
+
+
+if __name__ == '__main__':
+    load_dotenv(join(dirname(__file__), '.env'))
+    db = MongoClient(os.environ.get("MONGODB_URI"))[os.environ.get("DB_NAME")]
+
+    for collection, name in ensure_indexes(db):
+        print(f"index ok: {collection}.{name}")
+
+    if '--check' in sys.argv[1:]:
+        failures = check_query_plans(db)
+        for name, collection, stages in failures:
+            print(f"COLLSCAN: {name} ({collection}) -> {' > '.join(stages)}")
+        if failures:
+            sys.exit(1)
+        print("semua query memakai index")
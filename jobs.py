@@ -0,0 +1,228 @@
+"""Antrean job latar belakang di koleksi Mongo `jobs`.
+
+Route cukup memanggil `enqueue(db, 'nama.job', **args)` lalu langsung
+mengembalikan response; pekerjaannya dijalankan oleh worker:
+
+- thread di setiap proses web (JOBS_THREADS, default 1; 0 = tidak ada),
+  dimulai pada request pertama proses tersebut (app.py)
+- proses terpisah `python worker.py` (lihat file tersebut)
+
+Dokumen job:
+
+    {'name': 'storage.image_variants', 'args': {'area': 'produk', 'key': '...'},
+     'status': 'queued', 'attempts': 0, 'max_attempts': 5,
+     'run_at': datetime(...), 'lease': None, 'error': None, 'created_at': datetime(...)}
+
+Worker mengambil job dengan satu `find_one_and_update` (status `queued` atau
+`running`, `run_at` sudah lewat) dan memundurkan `run_at` sejauh visibility
+timeout (JOBS_VISIBILITY_S). Jika worker mati di tengah job, job terlihat lagi
+setelah timeout dan diambil worker lain. Job yang gagal dicoba ulang dengan
+backoff eksponensial (JOBS_BACKOFF_S sampai JOBS_BACKOFF_MAX_S); setelah
+`max_attempts` statusnya `failed` dan tidak diambil lagi. Job `done` dihapus
+otomatis oleh TTL index setelah 7 hari.
+
+Job bisa berjalan lebih dari sekali (at-least-once), jadi handler harus aman
+diulang. Handler didaftarkan dengan `@handler('nama.job')` di modul pemilik
+pekerjaannya (lihat HANDLER_MODULES) dan dipanggil sebagai `func(db, **args)`.
+"""
+import importlib
+import logging
+import os
+import random
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+MAX_ATTEMPTS = int(os.environ.get('JOBS_MAX_ATTEMPTS', 5))
+VISIBILITY = float(os.environ.get('JOBS_VISIBILITY_S', 300))
+BACKOFF = float(os.environ.get('JOBS_BACKOFF_S', 5))
+BACKOFF_MAX = float(os.environ.get('JOBS_BACKOFF_MAX_S', 3600))
+POLL_INTERVAL = float(os.environ.get('JOBS_POLL_S', 1))
+
+# Modul yang mendaftarkan handler; diimpor oleh worker sebelum mengambil job
+HANDLER_MODULES = ['storage']
+
+HANDLERS = {}
+
+log = logging.getLogger(__name__)
+
+
+def handler(name):
+    """Decorator: daftarkan fungsi `func(db, **args)` sebagai handler job `name`."""
+    def register(func):
+        HANDLERS[name] = func
+        return func
+    return register
+
+
+def load_handlers():
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+def enqueue(db, name, delay=0, max_attempts=MAX_ATTEMPTS, **args):
+    """Masukkan job ke antrean; kembalikan `_id`-nya. `args` harus bisa disimpan sebagai BSON."""
+    now = datetime.now()
+    return db.jobs.insert_one({
+        'name': name,
+        'args': args,
+        'status': QUEUED,
+        'attempts': 0,
+        'max_attempts': max_attempts,
+        'run_at': now + timedelta(seconds=delay),
+        'lease': None,
+        'error': None,
+        'created_at': now,
+    }).inserted_id
+
+
+def claim(db, worker_id):
+    """Ambil satu job yang siap dijalankan (atomic) atau None."""
+    now = datetime.now()
+    return db.jobs.find_one_and_update(
+        {'status': {'$in': [QUEUED, RUNNING]}, 'run_at': {'$lte': now}},
+        {
+            '$set': {'status': RUNNING, 'run_at': now + timedelta(seconds=VISIBILITY),
+                     'lease': uuid.uuid4().hex, 'worker': worker_id, 'started_at': now},
+            '$inc': {'attempts': 1},
+        },
+        sort=[('run_at', 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def backoff(attempts):
+    """Jeda sebelum percobaan berikutnya: eksponensial dengan jitter."""
+    delay = min(BACKOFF * 2 ** (attempts - 1), BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _complete(db, job):
+    db.jobs.update_one({'_id': job['_id'], 'lease': job['lease']},
+                       {'$set': {'status': DONE, 'lease': None, 'error': None, 'finished_at': datetime.now()}})
+
+
+def _fail(db, job, error, retry=True):
+    now = datetime.now()
+    if retry and job['attempts'] < job.get('max_attempts', MAX_ATTEMPTS):
+        update = {'status': QUEUED, 'run_at': now + timedelta(seconds=backoff(job['attempts']))}
+    else:
+        update = {'status': FAILED, 'failed_at': now}
+    # Lease lama (job sudah diambil ulang worker lain setelah timeout) tidak mengubah apa pun
+    db.jobs.update_one({'_id': job['_id'], 'lease': job['lease']},
+                       {'$set': {**update, 'lease': None, 'error': error}})
+
+
+def run_job(db, job):
+    """Jalankan satu job yang sudah di-claim. Kembalikan True jika berhasil."""
+    func = HANDLERS.get(job['name'])
+    if func is None:
+        _fail(db, job, f"handler tidak dikenal: {job['name']}", retry=False)
+        return False
+    if job['attempts'] > job.get('max_attempts', MAX_ATTEMPTS):
+        # Percobaan terakhir tidak pernah selesai (worker mati / visibility timeout)
+        _fail(db, job, job.get('error') or 'visibility timeout', retry=False)
+        return False
+    try:
+        func(db, **job.get('args', {}))
+    except Exception as e:
+        log.exception('job %s (%s) gagal, percobaan ke-%s', job['_id'], job['name'], job['attempts'])
+        _fail(db, job, f'{type(e).__name__}: {e}')
+        return False
+    _complete(db, job)
+    return True
+
+
+def run_pending(db, worker_id='inline', limit=None):
+    """Kerjakan job yang siap sampai antrean kosong (atau `limit` job). Kembalikan jumlahnya."""
+    count = 0
+    while limit is None or count < limit:
+        job = claim(db, worker_id)
+        if job is None:
+            break
+        run_job(db, job)
+        count += 1
+    return count
+
+
+def stats(db):
+    """Jumlah job per status dan beberapa job gagal terakhir."""
+    counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+    for row in db.jobs.aggregate([{'$group': {'_id': '$status', 'count': {'$sum': 1}}}]):
+        counts[row['_id']] = row['count']
+    failed = list(db.jobs.find({'status': FAILED}, {'name': 1, 'args': 1, 'attempts': 1, 'error': 1, 'failed_at': 1})
+                  .sort('failed_at', -1).limit(10))
+    for job in failed:
+        job['_id'] = str(job['_id'])
+    return {'counts': counts, 'failed': failed}
+
+
+class WorkerPool:
+    """Beberapa thread yang mengambil dan menjalankan job sampai `stop()` dipanggil."""
+
+    def __init__(self, db, threads=1, poll_interval=POLL_INTERVAL, name=None):
+        self.db = db
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.name = name or f'{os.uname().nodename}:{os.getpid()}'
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        load_handlers()
+        for i in range(self.threads):
+            thread = threading.Thread(target=self._loop, args=(f'{self.name}:{i}',),
+                                      name=f'jobs-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        """Berhenti setelah job yang sedang berjalan selesai."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _loop(self, worker_id):
+        while not self._stop.is_set():
+            try:
+                job = claim(self.db, worker_id)
+            except PyMongoError as e:
+                log.warning('gagal mengambil job: %s', e)
+                self._stop.wait(self.poll_interval * 5)
+                continue
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            try:
+                run_job(self.db, job)
+            except PyMongoError as e:
+                # Status job tidak tersimpan; job diambil ulang setelah visibility timeout
+                log.warning('gagal menyimpan status job %s: %s', job['_id'], e)
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def start_workers(db, threads=None):
+    """Mulai thread worker di proses ini (sekali per proses, aman dipanggil setelah fork).
+
+    Murah dipanggil berulang (misalnya di setiap request) setelah panggilan pertama.
+    """
+    global _pool, _pool_pid
+    if _pool_pid == os.getpid():
+        return _pool
+    with _pool_lock:
+        if _pool_pid == os.getpid():
+            return _pool
+        threads = int(os.environ.get('JOBS_THREADS', 1)) if threads is None else threads
+        _pool = WorkerPool(db, threads).start() if threads > 0 else None
+        _pool_pid = os.getpid()
+    return _pool
@@ -0,0 +1,101 @@
+"""Lapisan baca data pesanan.
+
+Pesanan dikembalikan sudah lengkap dengan data pengguna dan produk, sehingga
+satu halaman daftar pesanan selalu butuh jumlah query yang tetap (tidak N+1).
+"""
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from pagination import paginate
+
+# Status pesanan yang mungkin, sesuai urutan alurnya
+ORDER_STATUSES = ['Konfirmasi', 'Diproses', 'Dikirim', 'Selesai', 'Dibatalkan']
+
+# Field yang ditampilkan di kartu riwayat pemesanan pengguna
+HISTORY_FIELDS = {
+    'status': 1, 'nama_produk': 1, 'ukuran': 1, 'jumlah': 1, 'desain': 1, 'keterangan': 1,
+    'opsi_pengiriman': 1, 'metode_pembayaran': 1, 'bukti_pembayaran': 1,
+    'tanggal_pemesanan': 1, 'total_biaya': 1, 'items': 1,
+}
+
+
+class OrderFilterError(ValueError):
+    """Filter pesanan tidak valid; pesan siap ditampilkan ke admin."""
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise OrderFilterError(f'Format {name} harus YYYY-MM-DD.')
+
+
+def order_query(start=None, end=None, statuses=None):
+    """Filter pesanan: rentang `tanggal_pemesanan` (tanggal akhir ikut) dan status."""
+    query = {}
+    date_range = {}
+    if start:
+        date_range['$gte'] = _parse_date(start, 'start')
+    if end:
+        date_range['$lt'] = _parse_date(end, 'end') + timedelta(days=1)
+    if date_range:
+        query['tanggal_pemesanan'] = date_range
+    if statuses:
+        unknown = set(statuses) - set(ORDER_STATUSES)
+        if unknown:
+            raise OrderFilterError(f"Status tidak dikenal: {', '.join(sorted(unknown))}")
+        query['status'] = {'$in': list(statuses)}
+    return query
+
+
+def order_history(db, user_id, status=None, cursor=None, per_page=10):
+    """Satu halaman riwayat pesanan pengguna, terbaru lebih dulu (index user_id_status_id)."""
+    query = {'user_id': user_id}
+    if status:
+        query['status'] = status
+    return paginate(db.orders, query, sort=[('_id', -1)], cursor=cursor, per_page=per_page,
+                    projection=HISTORY_FIELDS, with_total=False)
+
+
+def design_files(order):
+    """File desain yang dipakai pesanan (pesanan keranjang punya satu per barang di `items`)."""
+    return [order.get('desain')] + [item.get('desain') for item in order.get('items') or []]
+
+
+def attach_users(db, orders):
+    """Tambahkan `user_name` ke setiap pesanan dengan satu query `$in`."""
+    user_ids = {order['user_id'] for order in orders if order.get('user_id')}
+    users = {}
+    if user_ids:
+        users = {u['_id']: u for u in db.users.find({'_id': {'$in': list(user_ids)}}, {'name': 1})}
+    for order in orders:
+        user = users.get(order.get('user_id'))
+        order['user_name'] = user['name'] if user else 'Pengguna Tidak Dikenal'
+    return orders
+
+
+def get_order_detail(db, order_id):
+    """Ambil satu pesanan beserta penggunanya dalam satu aggregation.
+
+    Mengembalikan tuple (order, user); order None jika tidak ditemukan. Data produk
+    yang ditampilkan sudah ada di pesanan (`nama_produk`, `ukuran`, `items`).
+    """
+    if not ObjectId.is_valid(order_id):
+        return None, None
+    order_id = ObjectId(order_id)
+
+    pipeline = [
+        {'$match': {'_id': order_id}},
+        {'$limit': 1},
+        {'$lookup': {'from': 'users', 'localField': 'user_id', 'foreignField': '_id', 'as': '_user'}},
+        # Password tidak pernah ikut
+        {'$project': {'_user.password': 0}},
+    ]
+    result = list(db.orders.aggregate(pipeline))
+    if not result:
+        return None, None
+
+    order = result[0]
+    users = order.pop('_user')
+    return order, (users[0] if users else None)
@@ -0,0 +1,73 @@
+"""Cache halaman publik (/, /produk, /about) beserta ETag dan 304.
+
+Halaman dirender sekali tanpa bagian navbar yang personal (nama dan foto
+pengguna). Bagian itu dirender terpisah per request dari `navbar_user.html`
+lalu disisipkan ke tempat penanda `<!--navbar-user-->`, sehingga pengguna
+yang login tetap mendapat cache hit untuk isi halaman.
+"""
+import hashlib
+import os
+from functools import wraps
+
+from flask import g, make_response, render_template, request, session
+
+from cache import TTLCache
+
+NAVBAR_MARKER = '<!--navbar-user-->'
+
+# PAGE_CACHE_TTL=0 mematikan cache halaman
+page_cache = TTLCache(
+    maxsize=int(os.environ.get('PAGE_CACHE_SIZE', 256)),
+    ttl=float(os.environ.get('PAGE_CACHE_TTL', 600)),
+)
+
+
+def inject_cache_flag():
+    """Context processor: beri tahu template bahwa halaman sedang dirender untuk cache."""
+    return {'render_for_cache': g.get('render_for_cache', False)}
+
+
+def _cache_key(version):
+    query = tuple(sorted(request.args.items(multi=True)))
+    return (request.endpoint, query, 'user' in session, version)
+
+
+def _personalize(body, base_etag):
+    fragment = render_template('navbar_user.html')
+    etag = hashlib.sha1(f'{base_etag}:{fragment}'.encode()).hexdigest()
+    response = make_response(body.replace(NAVBAR_MARKER, fragment, 1))
+    response.set_etag(etag)
+    # Browser selalu revalidasi; jika ETag sama server cukup membalas 304
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+
+def cached_page(get_version=None):
+    """Decorator untuk view GET publik yang hasilnya hanya bergantung pada
+    route, query string, status login, dan `get_version()` (misal versi katalog).
+    """
+    def wrapper(func):
+        @wraps(func)
+        def decorated_view(*args, **kwargs):
+            # Flash message bersifat sekali tampil, jangan diambil dari/masuk ke cache
+            if request.method != 'GET' or '_flashes' in session or not page_cache.enabled:
+                return func(*args, **kwargs)
+
+            version = get_version() if get_version else ''
+            key = _cache_key(version)
+            cached = page_cache.get(key)
+            if cached is None:
+                g.render_for_cache = True
+                try:
+                    response = make_response(func(*args, **kwargs))
+                finally:
+                    g.render_for_cache = False
+                if response.status_code != 200 or response.mimetype != 'text/html':
+                    return response
+                body = response.get_data(as_text=True)
+                cached = (body, hashlib.sha1(body.encode()).hexdigest())
+                page_cache.set(key, cached)
+
+            return _personalize(*cached)
+        return decorated_view
+    return wrapper
@@ -0,0 +1,171 @@
+"""Pagination berbasis cursor (keyset) untuk halaman daftar admin.
+
+Halaman berikutnya diambil dengan filter `key < key_terakhir` pada index,
+bukan dengan `.skip()`, sehingga biayanya tetap walaupun halaman makin dalam.
+"""
+import base64
+
+from bson import json_util
+from bson.errors import BSONError
+from flask import request, url_for
+from pymongo import ASCENDING, DESCENDING
+
+from cache import TTLCache
+
+DEFAULT_PER_PAGE = 5
+MAX_PER_PAGE = 100
+
+# Cache jumlah dokumen untuk query yang difilter: {(koleksi, query): jumlah}
+count_cache = TTLCache(maxsize=1024, ttl=60)
+
+
+def encode_cursor(data):
+    raw = json_util.dumps(data).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Kembalikan isi cursor, atau None jika cursor kosong/rusak."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        data = json_util.loads(raw)
+    except (ValueError, TypeError, BSONError):
+        return None
+    if not isinstance(data, dict) or data.get('d') not in ('next', 'prev'):
+        return None
+    # Cursor bisa diubah pengguna: bentuk field dicek di sini supaya paginate tidak error
+    n = data.get('n', 0)
+    if not isinstance(data.get('k'), list) or not isinstance(n, int) or isinstance(n, bool):
+        return None
+    return data
+
+
+def get_per_page(default=DEFAULT_PER_PAGE):
+    """Ambil per_page dari query string, dibatasi antara 1 dan MAX_PER_PAGE."""
+    try:
+        per_page = int(request.args.get('per_page', default))
+    except (TypeError, ValueError):
+        per_page = default
+    return max(1, min(per_page, MAX_PER_PAGE))
+
+
+def approximate_total(collection, query=None):
+    """Total dokumen: metadata koleksi jika tanpa filter, count yang di-cache jika ada filter."""
+    if not query:
+        return collection.estimated_document_count()
+
+    key = (collection.full_name, json_util.dumps(query, sort_keys=True))
+    total = count_cache.get(key)
+    if total is None:
+        total = collection.count_documents(query)
+        count_cache.set(key, total)
+    return total
+
+
+def _keyset_filter(sort, values, forward):
+    """Bangun filter untuk dokumen sesudah (forward) atau sebelum `values` menurut `sort`."""
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        descending = direction == DESCENDING
+        op = '$lt' if descending == forward else '$gt'
+        clause = {f: v for (f, _), v in zip(sort[:i], values[:i])}
+        clause[field] = {op: values[i]}
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {'$or': clauses}
+
+
+class Page:
+    """Satu halaman hasil pagination beserta cursor sebelum/sesudahnya."""
+
+    def __init__(self, items, per_page, start, has_prev, has_next, prev_cursor, next_cursor, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.start = start
+        self.has_prev = has_prev
+        self.has_next = has_next
+        self.prev_cursor = prev_cursor
+        self.next_cursor = next_cursor
+        self.total = total
+        # Endpoint untuk link halaman; default endpoint request saat ini
+        self.endpoint = None
+
+    @property
+    def page(self):
+        return self.start // self.per_page + 1
+
+    @property
+    def total_pages(self):
+        if self.total is None:
+            return None
+        return max(1, (self.total + self.per_page - 1) // self.per_page)
+
+    def url(self, cursor):
+        """URL halaman lain dengan query string yang sama (filter, per_page)."""
+        args = request.args.to_dict()
+        args.pop('cursor', None)
+        args['per_page'] = self.per_page
+        if cursor:
+            args['cursor'] = cursor
+        return url_for(self.endpoint or request.endpoint, **(request.view_args or {}), **args)
+
+    @property
+    def prev_url(self):
+        return self.url(self.prev_cursor)
+
+    @property
+    def next_url(self):
+        return self.url(self.next_cursor)
+
+
+def paginate(collection, query=None, sort=None, cursor=None, per_page=DEFAULT_PER_PAGE,
+             projection=None, with_total=True):
+    """Ambil satu halaman dari `collection` dengan keyset pagination.
+
+    `sort` harus berakhir dengan field unik (biasanya `_id`) supaya urutannya pasti,
+    dan sebaiknya didukung index (lihat indexes.py).
+    """
+    query = dict(query or {})
+    sort = list(sort or [('_id', ASCENDING)])
+    keys = [field for field, _ in sort]
+    state = decode_cursor(cursor)
+    if state and len(state.get('k') or []) != len(sort):
+        state = None
+
+    forward = True
+    start = 0
+    find_query = query
+    if state:
+        forward = state['d'] == 'next'
+        start = max(0, int(state.get('n', 0)))
+        keyset = _keyset_filter(sort, state['k'], forward)
+        find_query = {'$and': [query, keyset]} if query else keyset
+
+    find_sort = sort if forward else [(f, -d) for f, d in sort]
+    items = list(collection.find(find_query, projection).sort(find_sort).limit(per_page + 1))
+    has_more = len(items) > per_page
+    items = items[:per_page]
+    if not forward:
+        items.reverse()
+
+    if state is None:
+        has_prev, has_next = False, has_more
+    elif forward:
+        has_prev, has_next = True, has_more
+    else:
+        # Kembali ke halaman sebelumnya; jika tidak ada lagi data, ini halaman pertama
+        has_prev, has_next = has_more, True
+        if not has_more:
+            start = 0
+
+    prev_cursor = next_cursor = None
+    if items and has_prev:
+        prev_cursor = encode_cursor({'d': 'prev', 'k': [items[0].get(k) for k in keys],
+                                     'n': max(0, start - per_page)})
+    if items and has_next:
+        next_cursor = encode_cursor({'d': 'next', 'k': [items[-1].get(k) for k in keys],
+                                     'n': start + len(items)})
+
+    total = approximate_total(collection, query) if with_total else None
+    return Page(items, per_page, start, has_prev, has_next, prev_cursor, next_cursor, total)
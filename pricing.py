@@ -0,0 +1,203 @@
+"""Harga produk per ukuran, termasuk harga grosir per jumlah minimal.
+
+Struktur `dus_harga` di dokumen produk (divalidasi saat disimpan admin):
+
+    'dus_harga': [
+        {'ukuran': 'A4', 'hargaPcs': 1500,
+         'tiers': [{'min_qty': 100, 'hargaPcs': 1200}, {'min_qty': 500, 'hargaPcs': 1000}]},
+    ]
+
+`hargaPcs` berupa int (rupiah) untuk jumlah 1 ke atas; `tiers` (boleh kosong)
+urut naik menurut `min_qty` dan berlaku untuk jumlah >= `min_qty`. Ukuran
+disimpan sebagai list, bukan key dokumen, karena nama ukuran bebas diisi admin
+(boleh berisi titik). Peta ukuran -> tier dibuat sekali per snapshot katalog
+(`price_map`, lihat catalog.py).
+
+Produk lama (hargaPcs berupa string form) dinormalkan dengan:
+
+    python pricing.py            # tampilkan perubahan saja
+    python pricing.py --apply
+"""
+import argparse
+import re
+from os.path import join, dirname
+
+from dotenv import load_dotenv
+
+from database import get_db
+
+MAX_QUOTE_LINES = 50
+
+
+class PricingError(ValueError):
+    """Data harga tidak valid; pesan siap ditampilkan ke admin."""
+
+
+def parse_price(value):
+    """`'50.000'`, `'Rp 50,000'`, atau `50000` -> 50000."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        price = value
+    else:
+        text = re.sub(r'^rp\.?', '', str(value or '').strip().lower()).strip()
+        # Titik/koma dianggap pemisah ribuan (rupiah tanpa sen)
+        text = re.sub(r'[.,\s]', '', text)
+        if not text.isdigit():
+            raise PricingError(f'Harga tidak valid: {value!r}')
+        price = int(text)
+    if price <= 0:
+        raise PricingError(f'Harga harus lebih dari 0: {value!r}')
+    return price
+
+
+def parse_tiers(text):
+    """Isian harga grosir `'100:1200, 500:1.000'` -> list tier urut `min_qty`."""
+    tiers = []
+    for part in re.split(r'[;,\n]\s*(?=\d+\s*:)', str(text or '').strip()):
+        if not part.strip():
+            continue
+        min_qty, _, price = part.partition(':')
+        if not min_qty.strip().isdigit() or not price.strip():
+            raise PricingError(f'Format harga grosir harus "jumlah minimal:harga", bukan {part.strip()!r}')
+        tiers.append({'min_qty': int(min_qty), 'hargaPcs': parse_price(price)})
+    return _check_tiers(tiers)
+
+
+def _check_tiers(tiers):
+    tiers = sorted(tiers, key=lambda tier: tier['min_qty'])
+    seen = set()
+    for tier in tiers:
+        if tier['min_qty'] <= 1:
+            raise PricingError('Jumlah minimal harga grosir harus lebih dari 1.')
+        if tier['min_qty'] in seen:
+            raise PricingError(f"Jumlah minimal {tier['min_qty']} diisi lebih dari sekali.")
+        seen.add(tier['min_qty'])
+    return tiers
+
+
+def normalize(entries):
+    """Validasi dan ubah list `{'ukuran', 'hargaPcs', 'tiers'?}` ke bentuk tersimpan."""
+    result = []
+    seen = set()
+    for entry in entries:
+        ukuran = str(entry.get('ukuran') or '').strip()
+        if not ukuran:
+            raise PricingError('Ukuran tidak boleh kosong.')
+        if ukuran.lower() in seen:
+            raise PricingError(f'Ukuran {ukuran} diisi lebih dari sekali.')
+        seen.add(ukuran.lower())
+        tiers = entry.get('tiers') or []
+        if isinstance(tiers, str):
+            tiers = parse_tiers(tiers)
+        else:
+            tiers = _check_tiers([{'min_qty': int(t['min_qty']), 'hargaPcs': parse_price(t['hargaPcs'])}
+                                  for t in tiers])
+        result.append({'ukuran': ukuran, 'hargaPcs': parse_price(entry.get('hargaPcs')), 'tiers': tiers})
+    if not result:
+        raise PricingError('Minimal satu ukuran dan harga.')
+    return result
+
+
+def from_form(form):
+    """`dus_harga` dari form admin produk (ukuran[], hargaPcs[], grosir[])."""
+    ukuran = form.getlist('ukuran[]')
+    harga = form.getlist('hargaPcs[]')
+    grosir = form.getlist('grosir[]') or [''] * len(ukuran)
+    return normalize({'ukuran': u, 'hargaPcs': h, 'tiers': g} for u, h, g in zip(ukuran, harga, grosir))
+
+
+def price_map(product):
+    """{ukuran: [(min_qty, harga), ...] urut turun}; entri yang tidak valid dilewati."""
+    prices = {}
+    for entry in product.get('dus_harga', []):
+        try:
+            tiers = [(1, parse_price(entry.get('hargaPcs')))]
+            tiers += [(int(t['min_qty']), parse_price(t['hargaPcs'])) for t in entry.get('tiers') or []]
+        except (PricingError, KeyError, TypeError, ValueError):
+            continue
+        prices[entry.get('ukuran')] = sorted(tiers, reverse=True)
+    return prices
+
+
+def unit_price(prices, ukuran, jumlah):
+    """Harga per satuan dari `price_map` untuk `jumlah`, atau None jika ukuran tidak ada."""
+    for min_qty, price in prices.get(ukuran, []):
+        if jumlah >= min_qty:
+            return price
+    return None
+
+
+def lowest_price(prices):
+    """Harga dasar termurah (untuk "mulai dari")."""
+    base = [tiers[-1][1] for tiers in prices.values() if tiers]
+    return min(base) if base else None
+
+
+def quote(price_maps, lines):
+    """Hitung harga beberapa baris `{'produk_id', 'ukuran', 'jumlah'}` sekaligus.
+
+    `price_maps` adalah {produk_id (str): price_map}. Baris yang tidak valid
+    mendapat `error` dan tidak ikut dijumlahkan.
+    """
+    if not isinstance(lines, list) or not lines:
+        raise PricingError('Isi minimal satu baris pesanan.')
+    if len(lines) > MAX_QUOTE_LINES:
+        raise PricingError(f'Maksimal {MAX_QUOTE_LINES} baris per permintaan.')
+
+    result = []
+    total = 0
+    for line in lines:
+        line = line if isinstance(line, dict) else {}
+        produk_id, ukuran = str(line.get('produk_id') or ''), line.get('ukuran')
+        row = {'produk_id': produk_id, 'ukuran': ukuran, 'jumlah': line.get('jumlah')}
+        try:
+            jumlah = int(line.get('jumlah'))
+        except (TypeError, ValueError):
+            jumlah = 0
+        prices = price_maps.get(produk_id)
+        price = unit_price(prices, ukuran, jumlah) if prices is not None and jumlah >= 1 else None
+        if prices is None:
+            row['error'] = 'Produk tidak ditemukan.'
+        elif jumlah < 1:
+            row['error'] = 'Jumlah minimal 1.'
+        elif price is None:
+            row['error'] = 'Ukuran tidak valid.'
+        else:
+            row.update(jumlah=jumlah, harga_per_satuan=price, subtotal=price * jumlah)
+            # Tier berikutnya (untuk info "beli N atau lebih: Rp X/pcs")
+            cheaper = [(q, p) for q, p in prices[ukuran] if q > jumlah]
+            if cheaper:
+                row['tier_berikutnya'] = {'min_qty': cheaper[-1][0], 'hargaPcs': cheaper[-1][1]}
+            total += row['subtotal']
+        result.append(row)
+    return {'lines': result, 'total': total}
+
+
+def migrate(db, apply=False, log=print):
+    """Normalkan `dus_harga` semua produk. Kembalikan (jumlah diubah, jumlah gagal)."""
+    changed = failed = 0
+    for product in db.products.find({}, {'nama_produk': 1, 'dus_harga': 1}):
+        try:
+            dus_harga = normalize(product.get('dus_harga') or [])
+        except (PricingError, KeyError, TypeError, ValueError) as e:
+            log(f"GAGAL {product['_id']} {product.get('nama_produk')}: {e}")
+            failed += 1
+            continue
+        if dus_harga == product.get('dus_harga'):
+            continue
+        log(f"{product['_id']} {product.get('nama_produk')}: {product.get('dus_harga')} -> {dus_harga}")
+        if apply:
+            db.products.update_one({'_id': product['_id']}, {'$set': {'dus_harga': dus_harga}})
+        changed += 1
+    return changed, failed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Normalkan data harga produk (dus_harga).')
+    parser.add_argument('--apply', action='store_true', help='simpan perubahan (default: hanya tampilkan)')
+    args = parser.parse_args()
+
+    load_dotenv(join(dirname(__file__), '.env'))
+    changed, failed = migrate(get_db(), args.apply)
+    print(f"{changed} produk {'diubah' if args.apply else 'akan diubah'}, {failed} gagal")
+    if changed and args.apply:
+        print('Katalog di cache diperbarui setelah CATALOG_CACHE_TTL atau restart.')
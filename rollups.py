@@ -0,0 +1,232 @@
+"""Rekap penjualan harian/bulanan untuk laporan admin.
+
+Setiap dokumen di koleksi `rollups` berisi jumlah pesanan, jumlah barang,
+dan total pendapatan (`total_biaya`) untuk satu periode dan satu nilai dimensi:
+
+    {'_id': 'day:2024-12-13:produk:675b...', 'period': 'day', 'bucket': '2024-12-13',
+     'dim': 'produk', 'key': '675b...', 'label': 'Kartu Nama',
+     'orders': 3, 'quantity': 300, 'revenue': 45000}
+
+Dimensi: `all` (total), `produk`, `ukuran`, `status`, `metode_pembayaran`.
+Periode mengikuti `tanggal_pemesanan`. Rekap diperbarui saat pesanan dibuat,
+dihapus, atau berubah status; laporan hanya membaca koleksi ini. Untuk pesanan
+keranjang (`items`), dimensi `produk` dan `ukuran` dihitung per barang: satu
+pesanan masuk ke setiap produk/ukuran yang ada di dalamnya.
+
+Isi ulang dari seluruh pesanan (aggregation pipeline + `$merge`):
+
+    python rollups.py
+"""
+from os.path import join, dirname
+
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+from database import get_db, reporting
+
+# Format bucket; sama untuk strftime dan $dateToString
+PERIODS = {'day': '%Y-%m-%d', 'month': '%Y-%m'}
+DIMENSIONS = ['all', 'produk', 'ukuran', 'status', 'metode_pembayaran']
+
+# Field yang dibutuhkan dari dokumen pesanan (untuk projection)
+ORDER_FIELDS = {'tanggal_pemesanan': 1, 'total_biaya': 1, 'jumlah': 1, 'status': 1,
+                'produk_id': 1, 'nama_produk': 1, 'ukuran': 1, 'metode_pembayaran': 1, 'items': 1}
+
+
+def _lines(order):
+    """Barang dalam pesanan: `items` pesanan keranjang, atau pesanan satu produk itu sendiri."""
+    return order.get('items') or [{
+        'produk_id': order.get('produk_id'), 'nama_produk': order.get('nama_produk'), 'ukuran': order.get('ukuran'),
+        'jumlah': order.get('jumlah'), 'subtotal': order.get('total_biaya'),
+    }]
+
+
+def _key(value):
+    """Nilai dimensi sebagai string; kosong/tidak ada menjadi '-' (sama dengan _text_expression)."""
+    return '-' if value is None or value == '' else str(value)
+
+
+def _dimension_values(order):
+    """(dim, key, label, quantity, revenue) untuk setiap dimensi pesanan."""
+    quantity, revenue = order.get('jumlah') or 0, order.get('total_biaya') or 0
+    values = [
+        ('all', 'all', 'Semua', quantity, revenue),
+        ('status', _key(order.get('status')), _key(order.get('status')), quantity, revenue),
+        ('metode_pembayaran', _key(order.get('metode_pembayaran')), _key(order.get('metode_pembayaran')),
+         quantity, revenue),
+    ]
+    # Barang dengan produk/ukuran yang sama dalam satu pesanan digabung (pesanan dihitung sekali)
+    per_line = {}
+    for line in _lines(order):
+        ukuran = _key(line.get('ukuran'))
+        for dim, key, label in (('produk', _key(line.get('produk_id')), _key(line.get('nama_produk'))),
+                                ('ukuran', ukuran, ukuran)):
+            row = per_line.setdefault((dim, key), [label, 0, 0])
+            row[1] += line.get('jumlah') or 0
+            row[2] += line.get('subtotal') or 0
+    values.extend((dim, key, label, q, r) for (dim, key), (label, q, r) in per_line.items())
+    return values
+
+
+def _update(period, bucket, dim, key, label, orders, quantity, revenue):
+    return UpdateOne(
+        {'_id': f'{period}:{bucket}:{dim}:{key}'},
+        {
+            '$inc': {'orders': orders, 'quantity': quantity, 'revenue': revenue},
+            '$set': {'label': label},
+            '$setOnInsert': {'period': period, 'bucket': bucket, 'dim': dim, 'key': key},
+        },
+        upsert=True
+    )
+
+
+def _buckets(order):
+    date = order.get('tanggal_pemesanan')
+    if not date:
+        return []
+    return [(period, date.strftime(fmt)) for period, fmt in PERIODS.items()]
+
+
+def record_order(db, order, sign=1):
+    """Tambahkan pesanan ke rekap (`sign=-1` untuk pesanan yang dihapus)."""
+    record_orders(db, [order], sign)
+
+
+def record_orders(db, orders, sign=1):
+    """Seperti record_order untuk banyak pesanan dalam satu bulk_write."""
+    ops = []
+    for order in orders:
+        ops.extend(
+            _update(period, bucket, dim, key, label, sign, sign * quantity, sign * revenue)
+            for period, bucket in _buckets(order)
+            for dim, key, label, quantity, revenue in _dimension_values(order)
+        )
+    if ops:
+        db.rollups.bulk_write(ops, ordered=False)
+
+
+def record_status_change(db, order, old_status, new_status):
+    """Pindahkan pesanan dari rekap status lama ke status baru."""
+    record_status_changes(db, [(order, old_status, new_status)])
+
+
+def record_status_changes(db, changes):
+    """Seperti record_status_change untuk daftar (order, status lama, status baru)."""
+    ops = []
+    for order, old_status, new_status in changes:
+        if old_status == new_status:
+            continue
+        quantity = order.get('jumlah') or 0
+        revenue = order.get('total_biaya') or 0
+        for period, bucket in _buckets(order):
+            if old_status:
+                ops.append(_update(period, bucket, 'status', old_status, old_status, -1, -quantity, -revenue))
+            ops.append(_update(period, bucket, 'status', new_status, new_status, 1, quantity, revenue))
+    if ops:
+        db.rollups.bulk_write(ops, ordered=False)
+
+
+# Dimensi yang dihitung per barang (lihat _lines)
+LINE_DIMENSIONS = {'produk': ('$_line.produk_id', '$_line.nama_produk'), 'ukuran': ('$_line.ukuran', None)}
+
+
+def _text_expression(field):
+    """Versi aggregation dari _key: null, field tidak ada, atau string kosong menjadi '-'."""
+    return {'$cond': [{'$eq': [{'$ifNull': [field, '']}, '']}, '-', {'$toString': field}]}
+
+
+def _key_expression(dim):
+    if dim == 'all':
+        return {'$literal': 'all'}, {'$literal': 'Semua'}
+    field, label_field = LINE_DIMENSIONS.get(dim, (f'${dim}', None))
+    key = _text_expression(field)
+    label = _text_expression(label_field) if label_field else key
+    return key, label
+
+
+def _group_stages(dim, fmt):
+    """Tahap aggregation sampai satu dokumen per (bucket, key) dengan orders/quantity/revenue."""
+    key, label = _key_expression(dim)
+    bucket = {'$dateToString': {'format': fmt, 'date': '$tanggal_pemesanan'}}
+    if dim not in LINE_DIMENSIONS:
+        return [{'$group': {
+            '_id': {'bucket': bucket, 'key': key},
+            'label': {'$last': label},
+            'orders': {'$sum': 1},
+            'quantity': {'$sum': {'$ifNull': ['$jumlah', 0]}},
+            'revenue': {'$sum': {'$ifNull': ['$total_biaya', 0]}},
+        }}]
+    return [
+        {'$set': {'_line': {'$ifNull': ['$items', [{
+            'produk_id': '$produk_id', 'nama_produk': '$nama_produk', 'ukuran': '$ukuran',
+            'jumlah': '$jumlah', 'subtotal': '$total_biaya',
+        }]]}}},
+        {'$unwind': '$_line'},
+        # Satu baris per (pesanan, key) dulu supaya pesanan tidak terhitung dua kali
+        {'$group': {
+            '_id': {'order': '$_id', 'bucket': bucket, 'key': key},
+            'label': {'$last': label},
+            'quantity': {'$sum': {'$ifNull': ['$_line.jumlah', 0]}},
+            'revenue': {'$sum': {'$ifNull': ['$_line.subtotal', 0]}},
+        }},
+        {'$group': {
+            '_id': {'bucket': '$_id.bucket', 'key': '$_id.key'},
+            'label': {'$last': '$label'},
+            'orders': {'$sum': 1},
+            'quantity': {'$sum': '$quantity'},
+            'revenue': {'$sum': '$revenue'},
+        }},
+    ]
+
+
+def backfill(db):
+    """Bangun ulang seluruh rekap dari koleksi orders.
+
+    Jalankan saat sepi: pesanan yang masuk selama backfill bisa terhitung dua kali.
+    """
+    db.rollups.delete_many({})
+    for period, fmt in PERIODS.items():
+        for dim in DIMENSIONS:
+            db.orders.aggregate([
+                {'$match': {'tanggal_pemesanan': {'$type': 'date'}}},
+                *_group_stages(dim, fmt),
+                {'$project': {
+                    '_id': {'$concat': [period, ':', '$_id.bucket', ':', dim, ':', '$_id.key']},
+                    'period': {'$literal': period}, 'bucket': '$_id.bucket', 'dim': {'$literal': dim},
+                    'key': '$_id.key',
+                    'label': 1, 'orders': 1, 'quantity': 1, 'revenue': 1,
+                }},
+                {'$merge': {'into': 'rollups', 'whenMatched': 'replace', 'whenNotMatched': 'insert'}},
+            ])
+
+
+def report(db, period, dim, start, end, limit=10):
+    """Laporan dari rekap saja.
+
+    `series`: total per periode dalam rentang [start, end] (string bucket).
+    `breakdown`: nilai dimensi `dim` diurutkan dari pendapatan terbesar.
+    """
+    rollups = reporting(db.rollups)
+    bucket_range = {'$gte': start, '$lte': end}
+    series = [
+        {'bucket': doc['bucket'], 'orders': doc['orders'], 'quantity': doc['quantity'], 'revenue': doc['revenue']}
+        for doc in rollups.find({'period': period, 'dim': 'all', 'bucket': bucket_range}).sort('bucket', 1)
+    ]
+
+    totals = {}
+    for doc in rollups.find({'period': period, 'dim': dim, 'bucket': bucket_range}):
+        row = totals.setdefault(doc['key'], {'key': doc['key'], 'label': doc.get('label'),
+                                             'orders': 0, 'quantity': 0, 'revenue': 0})
+        row['orders'] += doc['orders']
+        row['quantity'] += doc['quantity']
+        row['revenue'] += doc['revenue']
+    breakdown = sorted((row for row in totals.values() if row['orders']),
+                       key=lambda row: row['revenue'], reverse=True)[:limit]
+    return {'period': period, 'dim': dim, 'start': start, 'end': end, 'series': series, 'breakdown': breakdown}
+
+
+if __name__ == '__main__':
+    load_dotenv(join(dirname(__file__), '.env'))
+    db = get_db()
+    backfill(db)
+    print(f"{db.rollups.estimated_document_count()} dokumen rekap dibuat")
@@ -0,0 +1,125 @@
+"""Pencarian produk (nama, kategori, deskripsi) dengan indeks terbalik di memori.
+
+Indeks dibangun dari snapshot katalog (catalog.py) dan dibangun ulang otomatis
+saat versi katalog berubah, jadi tidak ada query Mongo per pencarian. Setiap
+kata di query dicocokkan sebagai awalan (`kar nam` menemukan "Kartu Nama");
+produk harus cocok dengan semua kata. Bobot: nama 3, kategori 2, deskripsi 1,
+dan kata yang sama persis dihitung dua kali lipat.
+"""
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+
+from catalog import get_snapshot
+from pricing import lowest_price, price_map
+
+FIELD_WEIGHTS = {'nama_produk': 3, 'kategori': 2, 'deskripsi': 1}
+MAX_LIMIT = 200
+
+
+def tokenize(text):
+    """Kata-kata huruf kecil tanpa aksen (`"Print A3+"` -> `['print', 'a3']`)."""
+    text = unicodedata.normalize('NFKD', str(text or '')).encode('ascii', 'ignore').decode()
+    return re.findall(r'[a-z0-9]+', text.lower())
+
+
+def _project(product):
+    """Field produk yang dikirim ke hasil pencarian."""
+    return {
+        'id': str(product['_id']),
+        'nama_produk': product.get('nama_produk'),
+        'kategori': product.get('kategori'),
+        'deskripsi': product.get('deskripsi'),
+        'photo': product.get('photo'),
+        'harga_mulai': lowest_price(price_map(product)),
+    }
+
+
+class SearchIndex:
+    def __init__(self, products, version=None):
+        self.version = version
+        # Urutan katalog (terbaru lebih dulu) dipakai saat skor sama
+        self.docs = [_project(product) for product in products]
+        self.postings = {}
+        for i, doc in enumerate(self.docs):
+            for field, weight in FIELD_WEIGHTS.items():
+                for term in tokenize(doc.get(field)):
+                    scores = self.postings.setdefault(term, {})
+                    scores[i] = max(scores.get(i, 0), weight)
+        self.terms = sorted(self.postings)
+        self.categories = sorted(Counter(doc['kategori'] for doc in self.docs if doc.get('kategori')).items())
+
+    def _prefixed(self, token):
+        start = bisect_left(self.terms, token)
+        for term in self.terms[start:]:
+            if not term.startswith(token):
+                break
+            yield term
+
+    def _match(self, tokens):
+        """Indeks dokumen yang cocok dengan semua kata, urut dari skor tertinggi."""
+        scores = None
+        for token in tokens:
+            token_scores = {}
+            for term in self._prefixed(token):
+                boost = 2 if term == token else 1
+                for i, weight in self.postings[term].items():
+                    token_scores[i] = max(token_scores.get(i, 0), weight * boost)
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {i: score + token_scores[i] for i, score in scores.items() if i in token_scores}
+            if not scores:
+                return []
+        return sorted(scores, key=lambda i: (-scores[i], i))
+
+    def search(self, query='', kategori=None, limit=None):
+        """Produk yang cocok dengan `query`, facet kategori, dan hasil per `kategori`.
+
+        Facet dihitung sebelum filter kategori supaya jumlah kategori lain tetap terlihat.
+        """
+        tokens = tokenize(query)
+        matched = self._match(tokens) if tokens else range(len(self.docs))
+        facets = Counter(self.docs[i]['kategori'] for i in matched if self.docs[i].get('kategori'))
+        if kategori:
+            matched = [i for i in matched if self.docs[i].get('kategori') == kategori]
+        limit = max(1, min(limit or MAX_LIMIT, MAX_LIMIT))
+        return {
+            'query': query,
+            'kategori': kategori,
+            'total': len(matched),
+            'results': [self.docs[i] for i in list(matched)[:limit]],
+            'facets': [{'kategori': name, 'count': count} for name, count in sorted(facets.items())],
+        }
+
+    def suggest(self, prefix, limit=8):
+        """Saran typeahead: nama produk dan kategori yang cocok dengan awalan."""
+        tokens = tokenize(prefix)
+        limit = max(1, min(limit, MAX_LIMIT))
+        if not tokens:
+            return {'query': prefix, 'products': [], 'categories': []}
+        products = [{'id': self.docs[i]['id'], 'nama_produk': self.docs[i]['nama_produk'],
+                     'kategori': self.docs[i]['kategori']}
+                    for i in self._match(tokens)[:limit]]
+        categories = [name for name, _ in self.categories
+                      if ' '.join(tokenize(name)).startswith(' '.join(tokens))]
+        return {'query': prefix, 'products': products, 'categories': categories[:limit]}
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def search_index(db):
+    """Indeks untuk versi katalog saat ini (dibangun ulang jika katalog berubah)."""
+    global _index
+    snapshot = get_snapshot(db)
+    index = _index
+    if index is None or index.version != snapshot['version']:
+        with _lock:
+            index = _index
+            if index is None or index.version != snapshot['version']:
+                index = _index = SearchIndex(snapshot['products'], snapshot['version'])
+    return index
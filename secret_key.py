@@ -0,0 +1,42 @@
+"""Secret key Flask yang sama untuk semua worker dan tetap setelah restart.
+
+Urutan sumber:
+1. env SECRET_KEY
+2. isi file di env SECRET_KEY_FILE (misalnya Docker/Kubernetes secret)
+3. file lokal SECRET_KEY_PATH (default `.data/secret_key`), dibuat sekali
+   secara atomic jika belum ada sehingga worker yang start bersamaan tetap
+   mendapat key yang sama.
+"""
+import os
+import secrets
+import tempfile
+
+SECRET_KEY_PATH = os.environ.get('SECRET_KEY_PATH', './.data/secret_key')
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read().strip()
+
+
+def load_secret_key():
+    if os.environ.get('SECRET_KEY'):
+        return os.environ['SECRET_KEY']
+    if os.environ.get('SECRET_KEY_FILE'):
+        return _read(os.environ['SECRET_KEY_FILE'])
+
+    if os.path.exists(SECRET_KEY_PATH):
+        return _read(SECRET_KEY_PATH)
+    directory = os.path.dirname(SECRET_KEY_PATH) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.secret-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(secrets.token_hex(32))
+        # link() gagal jika file sudah ada: proses yang kalah memakai key pemenang
+        os.link(tmp_path, SECRET_KEY_PATH)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(tmp_path)
+    return _read(SECRET_KEY_PATH)
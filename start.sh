@@ -14,5 +14,8 @@ fi
 
 $VIRTUALENV/bin/pip install -r requirements.txt
 
-$VIRTUALENV/bin/python3 app.py
+mkdir -p .data
+
+# Server produksi (multi-worker); untuk development: $VIRTUALENV/bin/python3 app.py
+exec $VIRTUALENV/bin/gunicorn -c gunicorn.conf.py wsgi:app
 Footer
\ No newline at end of file
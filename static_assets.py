@@ -0,0 +1,174 @@
+"""Aset statis dengan sidik jari (hash isi), cache panjang, dan versi terkompresi.
+
+- Manifest memetakan `style.css` -> `style.1a2b3c4d5e.css` untuk file di
+  ASSET_DIRS (CSS, JS, gambar bawaan). `url_for('static', filename='style.css')`
+  otomatis menghasilkan URL ber-hash lewat `hashed_static_url` (url_defaults).
+- `serve_static` menggantikan route static bawaan Flask: URL ber-hash dan file
+  upload yang namanya sudah hash SHA-256 (storage.py) dikirim dengan
+  `Cache-Control: immutable` (`private` kecuali foto produk, supaya desain dan
+  bukti pembayaran tidak disimpan cache bersama); file teks dikirim dari
+  sibling `.br`/`.gz` sesuai `Accept-Encoding` (kecuali permintaan Range).
+
+Manifest dan file terkompresi dibuat saat aplikasi start jika belum ada atau
+sudah basi, atau lebih dulu saat deploy:
+
+    python static_assets.py
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import tempfile
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # Brotli opsional: tanpa modul ini hanya .gz yang dibuat
+    brotli = None
+
+STATIC_DIR = './static'
+MANIFEST_PATH = os.environ.get('STATIC_MANIFEST_PATH', './.data/static-manifest.json')
+
+# File/folder (relatif terhadap static/) yang diberi sidik jari; folder upload tidak termasuk
+ASSET_DIRS = ['style.css', 'script.js', 'gambar', 'img', 'css', 'js']
+COMPRESS_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.html'}
+MIN_COMPRESS_SIZE = 512
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+PRIVATE_IMMUTABLE = 'private, max-age=31536000, immutable'
+
+# Nama file upload berbasis isi dari storage.py: <sha256>.<ext> (juga turunan gambarnya)
+_CONTENT_ADDRESSED = re.compile(r'(^|/)[0-9a-f]{64}(\.[a-z]+)+$')
+# Folder upload yang isinya publik (area `produk` di storage.py); upload lain hanya untuk pemiliknya/admin
+PUBLIC_UPLOAD_DIRS = ('assets/imgProduk/',)
+
+_manifest = {}  # nama asli -> nama ber-hash
+_reverse = {}   # nama ber-hash -> nama asli
+
+
+def _hashed_name(name, digest):
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{digest[:10]}{ext}'
+
+
+def _asset_files():
+    for entry in ASSET_DIRS:
+        path = os.path.join(STATIC_DIR, entry)
+        if os.path.isfile(path):
+            yield entry
+            continue
+        for root, _, files in os.walk(path):
+            for name in files:
+                if name.endswith(('.gz', '.br')) or name.startswith('.'):
+                    continue
+                yield os.path.relpath(os.path.join(root, name), STATIC_DIR).replace(os.sep, '/')
+
+
+def _write_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.part-')
+    with os.fdopen(fd, 'wb') as out:
+        out.write(data)
+    os.replace(tmp_path, path)
+
+
+def _compress(path, data):
+    """Tulis sibling .gz dan .br jika belum ada atau lebih tua dari file aslinya."""
+    mtime = os.path.getmtime(path)
+    encoders = [('.gz', lambda d: gzip.compress(d, 9, mtime=0))]
+    if brotli:
+        encoders.append(('.br', lambda d: brotli.compress(d, quality=11)))
+    for suffix, encode in encoders:
+        target = path + suffix
+        if os.path.exists(target) and os.path.getmtime(target) >= mtime:
+            continue
+        compressed = encode(data)
+        if len(compressed) < len(data):
+            _write_atomic(target, compressed)
+
+
+def build_manifest(compress=True):
+    """Hitung hash semua aset, tulis manifest ke MANIFEST_PATH, dan buat versi terkompresi."""
+    manifest = {}
+    for name in sorted(_asset_files()):
+        path = os.path.join(STATIC_DIR, name)
+        with open(path, 'rb') as f:
+            data = f.read()
+        manifest[name] = _hashed_name(name, hashlib.sha256(data).hexdigest())
+        if compress and os.path.splitext(name)[1].lower() in COMPRESS_EXTENSIONS and len(data) >= MIN_COMPRESS_SIZE:
+            _compress(path, data)
+
+    os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+    _write_atomic(MANIFEST_PATH, json.dumps(manifest, indent=1, sort_keys=True).encode())
+    return manifest
+
+
+def _manifest_is_fresh():
+    try:
+        built = os.path.getmtime(MANIFEST_PATH)
+    except FileNotFoundError:
+        return False
+    return all(os.path.getmtime(os.path.join(STATIC_DIR, name)) <= built for name in _asset_files())
+
+
+def load_manifest():
+    """Muat manifest (dibuat ulang jika ada aset yang berubah) ke memori proses."""
+    global _manifest, _reverse
+    if _manifest_is_fresh():
+        with open(MANIFEST_PATH) as f:
+            manifest = json.load(f)
+    else:
+        manifest = build_manifest()
+    _manifest = manifest
+    _reverse = {hashed: name for name, hashed in manifest.items()}
+    return manifest
+
+
+def hashed_static_url(endpoint, values):
+    """url_defaults: ganti `filename` static dengan nama ber-hash dari manifest."""
+    if endpoint == 'static' and values.get('filename') in _manifest:
+        values['filename'] = _manifest[values['filename']]
+
+
+def _accepts(encoding):
+    # `br;q=0` berarti ditolak
+    return request.accept_encodings[encoding] > 0
+
+
+def serve_static(filename):
+    """Pengganti view `static` bawaan Flask."""
+    original = _reverse.get(filename)
+    if original is not None or (_CONTENT_ADDRESSED.search(filename) and filename.startswith(PUBLIC_UPLOAD_DIRS)):
+        cache_control = IMMUTABLE
+    elif _CONTENT_ADDRESSED.search(filename):
+        cache_control = PRIVATE_IMMUTABLE
+    else:
+        cache_control = None
+    filename = original or filename
+
+    encoding = None
+    # Range dihitung terhadap isi asli, jadi permintaan Range selalu dilayani dari file aslinya
+    if os.path.splitext(filename)[1].lower() in COMPRESS_EXTENSIONS and 'Range' not in request.headers:
+        for name, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if _accepts(name) and os.path.isfile(os.path.join(STATIC_DIR, filename + suffix)):
+                encoding = (name, suffix)
+                break
+
+    if encoding:
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_from_directory(STATIC_DIR, filename + encoding[1], mimetype=mimetype)
+        response.headers['Content-Encoding'] = encoding[0]
+    else:
+        response = send_from_directory(STATIC_DIR, filename)
+    if os.path.splitext(filename)[1].lower() in COMPRESS_EXTENSIONS:
+        response.vary.add('Accept-Encoding')
+    if cache_control:
+        response.headers['Cache-Control'] = cache_control
+    return response
+
+
+if __name__ == '__main__':
+    manifest = build_manifest()
+    print(f"{len(manifest)} aset ditulis ke {MANIFEST_PATH}")
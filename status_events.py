@@ -0,0 +1,138 @@
+"""Riwayat perubahan status pesanan (audit trail) di koleksi append-only `status_events`.
+
+Setiap perubahan status menambah satu dokumen (tidak pernah diubah/dihapus):
+
+    {'order_id': ObjectId(...), 'from': 'Konfirmasi', 'to': 'Diproses',
+     'ts': datetime(...), 'duration_s': 5400.0, 'actor': 'admin:Andi', 'source': 'admin'}
+
+`duration_s` adalah lama pesanan berada di status `from`, dihitung dari field
+`status_since` di dokumen pesanan saat status diganti. Jadi laporan lama per
+status cukup membaca event dalam rentang waktu (index `ts_from`), tanpa
+memindai seluruh pesanan. Pesanan yang masih tertahan di suatu status dibaca
+dari `orders` lewat index `status_status_since`.
+
+Event pertama (`from: None`) ditulis saat pesanan dibuat. Untuk pesanan lama
+yang belum punya `status_since`:
+
+    python status_events.py
+"""
+from datetime import datetime
+from os.path import join, dirname
+
+from bson import ObjectId
+from dotenv import load_dotenv
+
+from counters import count_order, move_order_status
+from database import get_db, reporting
+from orders import ORDER_STATUSES
+from rollups import ORDER_FIELDS, record_order, record_status_change
+
+# Field pesanan yang dibutuhkan untuk menulis event (untuk projection)
+STATUS_FIELDS = {'status': 1, 'status_since': 1, 'tanggal_pemesanan': 1}
+
+
+def _event(order, old_status, new_status, now, actor, source):
+    since = order.get('status_since') or order.get('tanggal_pemesanan')
+    return {
+        'order_id': order['_id'],
+        'from': old_status,
+        'to': new_status,
+        'ts': now,
+        'duration_s': (now - since).total_seconds() if old_status and since else None,
+        'actor': actor,
+        'source': source,
+    }
+
+
+def record_events(db, changes, now, actor=None, source=None):
+    """Tulis event untuk daftar (order sebelum diubah, status lama, status baru)."""
+    events = [_event(order, old, new, now, actor, source) for order, old, new in changes if old != new]
+    if events:
+        db.status_events.insert_many(events, ordered=False)
+
+
+def record_created(db, order, actor=None):
+    """Pesanan baru: perbarui penghitung, rekap, dan tulis event pertama.
+
+    `order` adalah dokumen yang sudah di-insert (punya `_id` dan `status_since`).
+    """
+    count_order(db, order['status'])
+    # Rekap ditulis langsung, bukan lewat antrean: job bisa berjalan lebih dari sekali dan `$inc` tidak aman diulang
+    record_order(db, order)
+    record_events(db, [(order, None, order['status'])], order['status_since'], actor, 'create')
+
+
+def change_status(db, order_id, new_status, actor=None, source=None):
+    """Ubah status satu pesanan jika berbeda; kembalikan dokumen sebelum diubah atau None.
+
+    Penghitung dashboard, rekap laporan, dan event ikut diperbarui.
+    """
+    now = datetime.now()
+    before = db.orders.find_one_and_update(
+        {'_id': ObjectId(order_id), 'status': {'$ne': new_status}},
+        {'$set': {'status': new_status, 'status_since': now}},
+        projection={**ORDER_FIELDS, **STATUS_FIELDS}
+    )
+    if before:
+        move_order_status(db, before.get('status'), new_status)
+        record_status_change(db, before, before.get('status'), new_status)
+        record_events(db, [(before, before.get('status'), new_status)], now, actor, source)
+    return before
+
+
+def order_timeline(db, order_id):
+    """Semua event satu pesanan, urut waktu (index `order_id_ts`)."""
+    return list(db.status_events.find({'order_id': ObjectId(order_id)}, {'_id': 0, 'order_id': 0}).sort('ts', 1))
+
+
+def time_in_status(db, start, end):
+    """Lama pesanan berada di tiap status, dari event yang keluar status itu dalam [start, end).
+
+    Per status: jumlah perpindahan, rata-rata, dan maksimum durasi (detik).
+    """
+    rows = reporting(db.status_events).aggregate([
+        {'$match': {'ts': {'$gte': start, '$lt': end}, 'from': {'$ne': None}}},
+        {'$group': {
+            '_id': '$from',
+            'count': {'$sum': 1},
+            'avg_s': {'$avg': '$duration_s'},
+            'max_s': {'$max': '$duration_s'},
+        }},
+    ])
+    result = {status: {'count': 0, 'avg_s': None, 'max_s': None} for status in ORDER_STATUSES}
+    for row in rows:
+        result[row['_id']] = {'count': row['count'], 'avg_s': row['avg_s'], 'max_s': row['max_s']}
+    return result
+
+
+def stuck_orders(db, older_than, statuses=None, now=None):
+    """Jumlah pesanan per status yang sudah lebih lama dari `older_than` (timedelta) di status itu."""
+    cutoff = (now or datetime.now()) - older_than
+    orders = reporting(db.orders)
+    result = {}
+    for status in statuses or ORDER_STATUSES:
+        oldest = orders.find_one({'status': status}, {'status_since': 1}, sort=[('status_since', 1)])
+        result[status] = {
+            'count': orders.count_documents({'status': status, 'status_since': {'$lt': cutoff}}),
+            'oldest_since': oldest.get('status_since') if oldest else None,
+        }
+    return result
+
+
+def backfill(db):
+    """Isi `status_since` dan event awal untuk pesanan lama (sebelum ada riwayat status)."""
+    done = 0
+    for order in db.orders.find({'status_since': {'$exists': False}}, STATUS_FIELDS):
+        since = order.get('tanggal_pemesanan') or datetime.now()
+        result = db.orders.update_one({'_id': order['_id'], 'status_since': {'$exists': False}},
+                                      {'$set': {'status_since': since}})
+        if result.modified_count:
+            # Waktu masuk status sekarang tidak diketahui; anggap sejak pesanan dibuat
+            record_events(db, [(order, None, order.get('status'))], since, None, 'backfill')
+            done += 1
+    return done
+
+
+if __name__ == '__main__':
+    load_dotenv(join(dirname(__file__), '.env'))
+    print(f"{backfill(get_db())} pesanan diisi status_since")
@@ -0,0 +1,145 @@
+"""Penyimpanan file upload berbasis isi (content-addressed).
+
+Setiap file disimpan sekali saja di bawah hash SHA-256 isinya, dengan folder
+bertingkat supaya satu folder tidak berisi terlalu banyak file:
+
+    static/uploads/ab/cd/abcd...ef.pdf
+
+Nilai yang disimpan di dokumen Mongo (misalnya `order['desain']`) adalah
+path relatif terhadap folder area (`ab/cd/abcd...ef.pdf`), jadi template
+tetap memakai `url_for('static', filename='uploads/' + order.desain)`.
+
+Jumlah pemakai tiap file dicatat di koleksi `blobs` (`refs`). File yang
+refs-nya 0 dibersihkan oleh gc_files.py (blob ditandai `deleting` selama proses
+hapus, lihat `_add_ref`). Varian gambar (images.py) dibuat
+oleh job latar belakang `storage.image_variants` (jobs.py).
+"""
+import hashlib
+import os
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from images import generate_variants
+from jobs import enqueue, handler
+from uploads import CHUNK_SIZE, check_upload, move_into_place
+
+# Area penyimpanan: folder tujuan dan jenis file yang diterima (uploads.UPLOAD_KINDS)
+AREAS = {
+    'desain': ('./static/uploads', 'desain'),
+    'bukti': ('./static/bukti_pembayaran', 'bukti'),
+    'produk': ('./static/assets/imgProduk', 'foto'),
+    'profil': ('./static/profil_user', 'foto'),
+}
+
+# Area berisi gambar yang dibuatkan thumbnail/WebP (images.py)
+IMAGE_AREAS = {'produk', 'profil'}
+
+EXTENSIONS = {'png': '.png', 'jpg': '.jpg', 'pdf': '.pdf', 'zip': '.zip', 'rar': '.rar'}
+
+
+def blob_key(digest, file_type):
+    return f'{digest[:2]}/{digest[2:4]}/{digest}{EXTENSIONS[file_type]}'
+
+
+def blob_path(area, key):
+    return os.path.join(AREAS[area][0], key)
+
+
+def _add_ref(db, area, key, size):
+    """Tambah refs blob. Kembalikan True jika blob sedang ditandai `deleting` oleh gc_files.py.
+
+    Dalam keadaan itu file bisa saja sudah (atau sebentar lagi) dipindahkan GC, jadi
+    pemanggil menulis ulang filenya walaupun masih ada; tanda `deleting` dihapus di sini
+    supaya GC tidak menghapus dokumen blob dan mengembalikan filenya.
+    """
+    before = db.blobs.find_one_and_update(
+        {'_id': f'{area}/{key}'},
+        {
+            '$inc': {'refs': 1},
+            '$setOnInsert': {'area': area, 'key': key, 'size': size, 'created': datetime.now()},
+            '$unset': {'released': '', 'deleting': '', 'deleting_at': ''},
+        },
+        projection={'deleting': 1},
+        upsert=True
+    )
+    return bool(before and before.get('deleting'))
+
+
+def _digest_of(stream):
+    """SHA-256 dari stream; memakai hasil hitungan saat upload jika ada."""
+    if hasattr(stream, 'sha256'):
+        return stream.sha256.hexdigest(), stream.size
+    digest = hashlib.sha256()
+    size = 0
+    for data in iter(lambda: stream.read(CHUNK_SIZE), b''):
+        digest.update(data)
+        size += len(data)
+    stream.seek(0)
+    return digest.hexdigest(), size
+
+
+@handler('storage.image_variants')
+def image_variants_job(db, area, key):
+    try:
+        generate_variants(blob_path(area, key))
+    except OSError:
+        # Gambar tidak bisa diproses Pillow (atau sudah dihapus): file asli tetap dipakai apa adanya
+        pass
+
+
+def store_upload(db, file, area):
+    """Validasi dan simpan FileStorage `file` ke `area`; kembalikan key-nya.
+
+    Melempar uploads.UploadError jika file tidak valid.
+    """
+    file_type = check_upload(file, AREAS[area][1])
+    digest, size = _digest_of(file.stream)
+    key = blob_key(digest, file_type)
+    # Referensi dicatat dulu supaya gc_files.py tidak menghapus file yang sama
+    deleting = _add_ref(db, area, key, size)
+    path = blob_path(area, key)
+    if deleting or not os.path.exists(path):
+        move_into_place(file.stream, path)
+    if area in IMAGE_AREAS:
+        # Sampai varian selesai dibuat, responsive_img memakai file asli
+        enqueue(db, 'storage.image_variants', area=area, key=key)
+    return key
+
+
+def store_file(db, src_path, area, file_type, digest):
+    """Simpan file yang sudah ada di disk (misalnya hasil upload bertahap)."""
+    key = blob_key(digest, file_type)
+    deleting = _add_ref(db, area, key, os.path.getsize(src_path))
+    path = blob_path(area, key)
+    if not deleting and os.path.exists(path):
+        os.remove(src_path)
+        return key
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        os.replace(src_path, path)
+    except OSError:
+        # Beda filesystem: salin secara atomic lalu hapus sumbernya
+        with open(src_path, 'rb') as stream:
+            move_into_place(stream, path)
+        os.remove(src_path)
+    return key
+
+
+def _release_op(area, key):
+    return UpdateOne(
+        {'_id': f'{area}/{key}', 'refs': {'$gt': 0}},
+        {'$inc': {'refs': -1}, '$set': {'released': datetime.now()}}
+    )
+
+
+def release(db, area, key):
+    """Kurangi jumlah pemakai file. Nama file lama (sebelum storage ini) diabaikan."""
+    release_many(db, [(area, key)])
+
+
+def release_many(db, files):
+    """Seperti release untuk daftar (area, key) dalam satu bulk_write."""
+    ops = [_release_op(area, key) for area, key in files if key]
+    if ops:
+        db.blobs.bulk_write(ops, ordered=False)
@@ -0,0 +1,145 @@
+"""Tes antrean job (jobs.py) dengan mongomock: `python -m pytest test_jobs.py`."""
+from datetime import datetime, timedelta
+
+import pytest
+
+import jobs
+
+mongomock = pytest.importorskip('mongomock')
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient().db
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Daftarkan handler tes; `calls` mencatat argumen setiap pemanggilan."""
+    calls = []
+
+    def ok(db, **args):
+        calls.append(args)
+
+    def gagal(db, **args):
+        calls.append(args)
+        raise RuntimeError('gagal')
+
+    monkeypatch.setitem(jobs.HANDLERS, 'tes.ok', ok)
+    monkeypatch.setitem(jobs.HANDLERS, 'tes.gagal', gagal)
+    return calls
+
+
+def test_claim_mengambil_job_siap_dan_memundurkan_run_at(db):
+    job_id = jobs.enqueue(db, 'tes.ok', x=1)
+    jobs.enqueue(db, 'tes.ok', delay=60)
+
+    job = jobs.claim(db, 'w1')
+    assert job['_id'] == job_id
+    assert job['status'] == jobs.RUNNING
+    assert job['attempts'] == 1
+    assert job['worker'] == 'w1'
+    assert job['lease']
+    assert job['run_at'] > datetime.now() + timedelta(seconds=jobs.VISIBILITY - 5)
+
+    # Job pertama sedang berjalan, job kedua belum waktunya
+    assert jobs.claim(db, 'w2') is None
+
+
+def test_run_pending_menyelesaikan_job(db, calls):
+    job_id = jobs.enqueue(db, 'tes.ok', x=1)
+
+    assert jobs.run_pending(db) == 1
+    assert calls == [{'x': 1}]
+    job = db.jobs.find_one({'_id': job_id})
+    assert job['status'] == jobs.DONE
+    assert job['lease'] is None
+
+
+def test_lease_lama_tidak_mengubah_job(db, monkeypatch):
+    job_id = jobs.enqueue(db, 'tes.ok')
+    monkeypatch.setattr(jobs, 'VISIBILITY', 0)
+    lama = jobs.claim(db, 'w1')
+    baru = jobs.claim(db, 'w2')
+    assert baru['lease'] != lama['lease']
+
+    jobs._complete(db, lama)
+    jobs._fail(db, lama, 'error lama', retry=False)
+    job = db.jobs.find_one({'_id': job_id})
+    assert job['status'] == jobs.RUNNING
+    assert job['lease'] == baru['lease']
+    assert job['error'] is None
+
+    jobs._complete(db, baru)
+    assert db.jobs.find_one({'_id': job_id})['status'] == jobs.DONE
+
+
+def test_gagal_dicoba_ulang_dengan_backoff(db, calls):
+    job_id = jobs.enqueue(db, 'tes.gagal', max_attempts=3)
+
+    assert jobs.run_pending(db) == 1
+    job = db.jobs.find_one({'_id': job_id})
+    assert job['status'] == jobs.QUEUED
+    assert job['attempts'] == 1
+    assert job['error'] == 'RuntimeError: gagal'
+    assert job['run_at'] > datetime.now()
+    # Belum waktunya dicoba lagi
+    assert jobs.run_pending(db) == 0
+
+
+def test_gagal_sampai_max_attempts_menjadi_failed(db, calls, monkeypatch):
+    monkeypatch.setattr(jobs, 'BACKOFF', 0)
+    job_id = jobs.enqueue(db, 'tes.gagal', max_attempts=3)
+
+    assert jobs.run_pending(db) == 3
+    assert len(calls) == 3
+    job = db.jobs.find_one({'_id': job_id})
+    assert job['status'] == jobs.FAILED
+    assert job['attempts'] == 3
+    assert jobs.run_pending(db) == 0
+    assert jobs.stats(db)['counts'][jobs.FAILED] == 1
+
+
+def test_backoff_eksponensial_dengan_batas(monkeypatch):
+    monkeypatch.setattr(jobs, 'BACKOFF', 5)
+    monkeypatch.setattr(jobs, 'BACKOFF_MAX', 30)
+    assert 2.5 <= jobs.backoff(1) <= 5
+    assert 10 <= jobs.backoff(3) <= 20
+    assert 15 <= jobs.backoff(10) <= 30
+
+
+def test_handler_tidak_dikenal_langsung_failed(db):
+    job_id = jobs.enqueue(db, 'tes.tidak_ada')
+
+    assert jobs.run_pending(db) == 1
+    job = db.jobs.find_one({'_id': job_id})
+    assert job['status'] == jobs.FAILED
+    assert job['attempts'] == 1
+
+
+def test_visibility_timeout_job_diambil_ulang(db, calls):
+    job_id = jobs.enqueue(db, 'tes.ok', max_attempts=2)
+    # Worker pertama mati setelah claim
+    mati = jobs.claim(db, 'w1')
+    assert jobs.run_pending(db) == 0
+
+    # Setelah visibility timeout lewat, job terlihat lagi dan dijalankan worker lain
+    db.jobs.update_one({'_id': job_id}, {'$set': {'run_at': datetime.now() - timedelta(seconds=1)}})
+    assert jobs.run_pending(db) == 1
+    assert calls == [{}]
+    job = db.jobs.find_one({'_id': job_id})
+    assert job['status'] == jobs.DONE
+    assert job['attempts'] == 2
+    assert job['worker'] != mati['worker']
+
+
+def test_visibility_timeout_percobaan_terakhir_menjadi_failed(db, calls, monkeypatch):
+    monkeypatch.setattr(jobs, 'VISIBILITY', 0)
+    job_id = jobs.enqueue(db, 'tes.ok', max_attempts=1)
+    jobs.claim(db, 'w1')
+
+    assert jobs.run_pending(db) == 1
+    assert calls == []
+    job = db.jobs.find_one({'_id': job_id})
+    assert job['status'] == jobs.FAILED
+    assert job['error'] == 'visibility timeout'
@@ -0,0 +1,153 @@
+"""Penanganan upload file secara streaming.
+
+- Batas ukuran per endpoint dipasang di `request.max_content_length`, jadi
+  request yang terlalu besar ditolak (413) sebelum body-nya dibaca habis.
+- File dari form langsung ditulis bertahap ke file sementara di
+  UPLOAD_TMP_DIR (bukan ke memori), lalu dipindah ke folder tujuan dengan
+  `os.replace` (atomic, tanpa menyalin ulang isi file); lihat storage.py.
+- Jenis file dicek dari magic bytes, bukan hanya dari ekstensi nama file.
+- SHA-256 isi file dihitung sambil ditulis (dipakai storage.py).
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+from flask import Request, request
+
+MB = 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+UPLOAD_TMP_DIR = os.environ.get('UPLOAD_TMP_DIR', './.data/upload_tmp')
+
+# Batas total body request untuk endpoint yang menerima file
+UPLOAD_LIMITS = {
+    'pemesanan': int(os.environ.get('UPLOAD_MAX_DESAIN_MB', 300)) * MB,
+    'tambah_keranjang': int(os.environ.get('UPLOAD_MAX_DESAIN_MB', 300)) * MB,  # form yang sama, tombol keranjang
+    'upload_bukti': 10 * MB,
+    'update_profile': 5 * MB,
+    'tambah_data_produk': 10 * MB,
+    'edit_data_produk': 10 * MB,
+    'upload_chunk': 16 * MB,  # satu potongan upload bertahap (chunked_upload.py)
+}
+
+# Jenis file yang diterima untuk tiap kegunaan upload
+UPLOAD_KINDS = {
+    'desain': {'png', 'jpg', 'pdf', 'zip', 'rar'},
+    'bukti': {'png', 'jpg', 'pdf', 'zip', 'rar'},
+    'foto': {'png', 'jpg'},
+}
+
+# Magic bytes di awal file untuk tiap jenis
+MAGIC_BYTES = [
+    ('png', b'\x89PNG\r\n\x1a\n'),
+    ('jpg', b'\xff\xd8\xff'),
+    ('pdf', b'%PDF-'),
+    ('zip', b'PK\x03\x04'),
+    ('zip', b'PK\x05\x06'),
+    ('rar', b'Rar!\x1a\x07'),
+]
+
+EXTENSION_TYPES = {'png': 'png', 'jpg': 'jpg', 'jpeg': 'jpg', 'pdf': 'pdf', 'zip': 'zip', 'rar': 'rar'}
+
+
+class UploadError(ValueError):
+    """File upload ditolak; pesan siap ditampilkan ke pengguna."""
+
+
+class HashingFile:
+    """File sementara yang menghitung SHA-256 dari semua data yang ditulis."""
+
+    def __init__(self, file):
+        self._file = file
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+
+class UploadRequest(Request):
+    """Request yang menulis file upload langsung ke UPLOAD_TMP_DIR."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        os.makedirs(UPLOAD_TMP_DIR, exist_ok=True)
+        stream = tempfile.NamedTemporaryFile(dir=UPLOAD_TMP_DIR, prefix='upload-', delete=False)
+        if not hasattr(self, '_upload_temp_paths'):
+            self._upload_temp_paths = []
+        self._upload_temp_paths.append(stream.name)
+        return HashingFile(stream)
+
+
+def apply_upload_limit():
+    """before_request: pasang batas ukuran body sesuai endpoint."""
+    limit = UPLOAD_LIMITS.get(request.endpoint)
+    if limit:
+        request.max_content_length = limit
+
+
+def cleanup_upload_temp(exc=None):
+    """teardown_request: hapus file sementara yang tidak dipindahkan ke tujuan."""
+    for path in getattr(request, '_upload_temp_paths', []):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def sniff_type(stream):
+    """Tebak jenis file dari magic bytes; posisi stream dikembalikan ke awal."""
+    head = stream.read(16)
+    stream.seek(0)
+    for file_type, magic in MAGIC_BYTES:
+        if head.startswith(magic):
+            return file_type
+    return None
+
+
+def check_upload(file, kind):
+    """Validasi ekstensi dan isi file untuk jenis upload `kind`; kembalikan jenis file."""
+    allowed = UPLOAD_KINDS[kind]
+    ext = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else ''
+    if EXTENSION_TYPES.get(ext) not in allowed:
+        raise UploadError('Ekstensi file tidak diizinkan.')
+    file_type = sniff_type(file.stream)
+    if file_type != EXTENSION_TYPES[ext]:
+        raise UploadError('Isi file tidak sesuai dengan ekstensinya.')
+    return file_type
+
+
+def move_into_place(stream, dest_path):
+    """Pindahkan isi stream ke dest_path secara atomic."""
+    dest_dir = os.path.dirname(dest_path)
+    os.makedirs(dest_dir, exist_ok=True)
+    tmp_path = getattr(stream, 'name', None)
+
+    if isinstance(tmp_path, str) and os.path.dirname(os.path.abspath(tmp_path)) == os.path.abspath(UPLOAD_TMP_DIR):
+        # File sudah ada di disk: cukup rename
+        stream.close()
+        try:
+            os.replace(tmp_path, dest_path)
+        except OSError:
+            # Beda filesystem: salin lalu hapus
+            shutil.move(tmp_path, dest_path)
+        return
+
+    # Stream lain (misalnya di memori): salin bertahap ke file sementara di folder tujuan
+    fd, part_path = tempfile.mkstemp(dir=dest_dir, prefix='.part-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            shutil.copyfileobj(stream, out, CHUNK_SIZE)
+        os.replace(part_path, dest_path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
@@ -0,0 +1,47 @@
+"""Loader data pengguna yang sedang login.
+
+Dalam satu request data pengguna hanya diambil sekali (disimpan di `flask.g`),
+dan antar request bisa dilayani dari cache TTL kecil per worker.
+"""
+import os
+
+from bson import ObjectId
+from flask import g, session
+
+from cache import TTLCache
+
+# Field yang dibutuhkan navbar dan halaman profil (tanpa password)
+USER_FIELDS = {'name': 1, 'email': 1, 'phone': 1, 'photo': 1, 'jenis_kelamin': 1, 'tanggal_lahir': 1}
+
+# USER_CACHE_TTL=0 mematikan cache antar request
+user_cache = TTLCache(
+    maxsize=int(os.environ.get('USER_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('USER_CACHE_TTL', 30)),
+)
+
+
+def get_user(db, user_id):
+    """Ambil pengguna berdasarkan id (dengan cache), None jika tidak ada."""
+    user_id = str(user_id)
+    user = user_cache.get(user_id)
+    if user is None:
+        if not ObjectId.is_valid(user_id):
+            return None
+        user = db.users.find_one({'_id': ObjectId(user_id)}, USER_FIELDS)
+        if user is not None:
+            user_cache.set(user_id, user)
+    return user
+
+
+def current_user(db):
+    """Pengguna yang sedang login untuk request ini, None jika belum login."""
+    if 'current_user' not in g:
+        user_id = session.get('user')
+        g.current_user = get_user(db, user_id) if user_id else None
+    return g.current_user
+
+
+def invalidate_user(user_id):
+    """Hapus pengguna dari cache setelah datanya diubah atau dihapus."""
+    user_cache.delete(str(user_id))
+    g.pop('current_user', None)
@@ -0,0 +1,55 @@
+"""Proses worker terpisah untuk antrean job (jobs.py).
+
+    python worker.py                # jalan terus (default 2 thread)
+    python worker.py --threads 4
+    python worker.py --once         # kerjakan job yang sudah siap lalu keluar
+    python worker.py --stats        # jumlah job per status
+
+Jika worker ini dipakai, thread worker di proses web bisa dimatikan dengan
+JOBS_THREADS=0.
+"""
+import argparse
+import json
+import logging
+import signal
+import sys
+from os.path import join, dirname
+
+from dotenv import load_dotenv
+
+from database import get_db
+from jobs import WorkerPool, load_handlers, run_pending, stats
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Jalankan job latar belakang dari koleksi jobs.')
+    parser.add_argument('--threads', type=int, default=2)
+    parser.add_argument('--once', action='store_true', help='kerjakan job yang siap lalu keluar')
+    parser.add_argument('--stats', action='store_true', help='tampilkan jumlah job per status')
+    args = parser.parse_args()
+
+    load_dotenv(join(dirname(__file__), '.env'))
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    db = get_db()
+
+    if args.stats:
+        print(json.dumps(stats(db), default=str, indent=2))
+        sys.exit(0)
+
+    if args.once:
+        load_handlers()
+        print(f"{run_pending(db)} job dikerjakan")
+        sys.exit(0)
+
+    pool = WorkerPool(db, args.threads).start()
+    stopping = []
+
+    def shutdown(signum, frame):
+        stopping.append(signum)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    logging.info('worker jalan dengan %s thread', args.threads)
+    while not stopping:
+        signal.pause()
+    logging.info('berhenti setelah job yang sedang berjalan selesai')
+    pool.stop()
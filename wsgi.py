@@ -0,0 +1,7 @@
+"""Entry point WSGI untuk produksi.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Konfigurasi worker/thread dan reload ada di gunicorn.conf.py.
+"""
+from app import app  # noqa: F401  (seluruh konfigurasi dilakukan saat app.py diimpor)